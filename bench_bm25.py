@@ -0,0 +1,88 @@
+# scripts/bench_bm25.py
+"""
+Benchmark BM25 query scoring: BM25Okapi.get_scores against SparseBM25.
+
+Builds synthetic code-like corpora of increasing size (Zipf-distributed
+identifiers), checks that both engines produce the same scores and rankings,
+and reports the average time per query. Also times picking the top 16
+results with a full sort against top_k_indices.
+
+Run from the project root:
+    python scripts/bench_bm25.py --sizes 1000 10000 50000 --queries 50
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+sys.path.insert(0, os.getcwd())
+
+from utils.retrieval import SparseBM25, top_k_indices
+
+def make_corpus(num_docs, vocab_size, doc_len, rng):
+    """Generate tokenized documents with a Zipf-like term distribution."""
+    vocabulary = [f"tok{i}" for i in range(vocab_size)]
+    weights = 1.0 / np.arange(1, vocab_size + 1)
+    weights /= weights.sum()
+    lengths = rng.integers(doc_len // 2, doc_len * 2, size=num_docs)
+    return [
+        [vocabulary[t] for t in rng.choice(vocab_size, size=length, p=weights)]
+        for length in lengths
+    ], vocabulary
+
+def time_queries(get_scores, queries):
+    start = time.perf_counter()
+    scores = [get_scores(query) for query in queries]
+    return (time.perf_counter() - start) / len(queries), scores
+
+def time_selection(select, all_scores):
+    start = time.perf_counter()
+    selected = [select(scores) for scores in all_scores]
+    return (time.perf_counter() - start) / len(all_scores), selected
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BM25 scoring engines")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000], help="Corpus sizes (documents)")
+    parser.add_argument("--queries", type=int, default=50, help="Queries per corpus size")
+    parser.add_argument("--vocab", type=int, default=20000, help="Vocabulary size")
+    parser.add_argument("--doc-len", type=int, default=120, help="Average tokens per document")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    print(f"{'docs':>8}{'build s':>10}{'BM25Okapi ms':>15}{'SparseBM25 ms':>15}{'speedup':>10}"
+          f"{'sort ms':>10}{'top-k ms':>10}  identical")
+    for size in args.sizes:
+        corpus, vocabulary = make_corpus(size, args.vocab, args.doc_len, rng)
+        queries = [
+            [vocabulary[t] for t in rng.integers(0, args.vocab // 10, size=rng.integers(1, 6))]
+            for _ in range(args.queries)
+        ]
+
+        bm25 = BM25Okapi(corpus)
+        start = time.perf_counter()
+        sparse = SparseBM25.from_bm25(bm25)
+        build_time = time.perf_counter() - start
+
+        okapi_time, okapi_scores = time_queries(bm25.get_scores, queries)
+        sparse_time, sparse_scores = time_queries(sparse.get_scores, queries)
+
+        sort_time, sorted_top = time_selection(
+            lambda scores: sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:16],
+            okapi_scores
+        )
+        top_k_time, selected_top = time_selection(lambda scores: top_k_indices(scores, 16), sparse_scores)
+
+        identical = sorted_top == selected_top and all(
+            np.array_equal(a, b) and
+            np.array_equal(np.argsort(-a, kind='stable'), np.argsort(-b, kind='stable'))
+            for a, b in zip(okapi_scores, sparse_scores)
+        )
+
+        print(f"{size:>8}{build_time:>10.2f}{okapi_time * 1000:>15.2f}{sparse_time * 1000:>15.3f}"
+              f"{okapi_time / sparse_time:>9.0f}x{sort_time * 1000:>10.2f}{top_k_time * 1000:>10.3f}  {identical}")
+
+if __name__ == "__main__":
+    main()
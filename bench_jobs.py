@@ -0,0 +1,145 @@
+# scripts/bench_jobs.py
+"""
+Benchmark job submission and status-transition throughput on jobs.db.
+
+Compares the old access pattern (a fresh connection and a commit per call in
+the default rollback-journal mode) with the pooled WAL job store and
+group-committing writer in utils.background.
+
+Only the database side is measured: jobs are written with the same statements
+create_job uses, but no dramatiq message is sent.
+
+Run from the project root:
+    python scripts/bench_jobs.py --jobs 2000 --threads 8
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+
+RESULT = {"explanation": "x" * 2000, "sources": []}
+
+def legacy_init(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        type TEXT NOT NULL,
+        status TEXT NOT NULL,
+        created_at TIMESTAMP NOT NULL,
+        updated_at TIMESTAMP NOT NULL,
+        params TEXT,
+        result TEXT,
+        error TEXT
+    )
+    ''')
+    conn.commit()
+    conn.close()
+
+def legacy_submit(db_path):
+    job_id = str(uuid.uuid4())
+    now = datetime.now().isoformat()
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute(
+        'INSERT INTO jobs (id, type, status, created_at, updated_at, params) VALUES (?, ?, ?, ?, ?, ?)',
+        (job_id, 'explanation', 'queued', now, now, json.dumps({'query': 'bench'}))
+    )
+    conn.commit()
+    conn.close()
+    return job_id
+
+def legacy_transition(db_path, job_id, status, result=None):
+    now = datetime.now().isoformat()
+    conn = sqlite3.connect(db_path, timeout=30)
+    if result is not None:
+        conn.execute(
+            'UPDATE jobs SET status = ?, updated_at = ?, result = ? WHERE id = ?',
+            (status, now, json.dumps(result), job_id)
+        )
+    else:
+        conn.execute(
+            'UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?',
+            (status, now, job_id)
+        )
+    conn.commit()
+    conn.close()
+
+def run_threads(num_threads, items, fn):
+    """Run fn over items split across threads and return items per second."""
+    chunks = [items[i::num_threads] for i in range(num_threads)]
+    results = [[] for _ in range(num_threads)]
+
+    def worker(n):
+        for item in chunks[n]:
+            results[n].append(fn(item))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(num_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    return len(items) / elapsed, [r for chunk in results for r in chunk]
+
+def bench_legacy(workdir, num_jobs, num_threads):
+    db_path = os.path.join(workdir, "legacy_jobs.db")
+    legacy_init(db_path)
+
+    submit_rate, job_ids = run_threads(
+        num_threads, list(range(num_jobs)), lambda _: legacy_submit(db_path)
+    )
+
+    def transition(job_id):
+        legacy_transition(db_path, job_id, 'processing')
+        legacy_transition(db_path, job_id, 'completed', RESULT)
+
+    transition_rate, _ = run_threads(num_threads, job_ids, transition)
+    return submit_rate, transition_rate * 2
+
+def bench_store(num_jobs, num_threads):
+    from utils import background
+
+    # Distinct queries, so that no submissions are coalesced
+    submit_rate, job_ids = run_threads(
+        num_threads, list(range(num_jobs)),
+        lambda n: background._record_job('explanation', {'query': f'bench {n}'})[0]
+    )
+
+    def transition(job_id):
+        background.update_job_status(job_id, background.JobStatus.PROCESSING)
+        background.update_job_status(job_id, background.JobStatus.COMPLETED, RESULT)
+
+    transition_rate, _ = run_threads(num_threads, job_ids, transition)
+    return submit_rate, transition_rate * 2
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the jobs database")
+    parser.add_argument("--jobs", type=int, default=2000, help="Number of jobs to submit")
+    parser.add_argument("--threads", type=int, default=8, help="Number of concurrent threads")
+    args = parser.parse_args()
+
+    # utils.background creates jobs.db and worker.db in the working directory,
+    # so run everything inside a scratch directory
+    sys.path.insert(0, os.getcwd())
+    workdir = tempfile.mkdtemp(prefix="bench_jobs_")
+    os.chdir(workdir)
+
+    legacy = bench_legacy(workdir, args.jobs, args.threads)
+    store = bench_store(args.jobs, args.threads)
+
+    print(f"{args.jobs} jobs, {args.threads} threads (scratch dir: {workdir})")
+    print(f"{'':<24}{'submit/s':>12}{'transition/s':>16}")
+    print(f"{'before (per-call conn)':<24}{legacy[0]:>12.0f}{legacy[1]:>16.0f}")
+    print(f"{'after (pooled WAL)':<24}{store[0]:>12.0f}{store[1]:>16.0f}")
+    print(f"{'speedup':<24}{store[0] / legacy[0]:>11.1f}x{store[1] / legacy[1]:>15.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-pip install dramatiq[sqlite] apscheduler
+pip install dramatiq[sqlite] apscheduler zstandard
 
 
 # utils/background.py
@@ -6,13 +6,22 @@ import os
 import json
 import time
 import uuid
+import zlib
+import queue
+import hashlib
 import sqlite3
 import threading
 import dramatiq
 from dramatiq.brokers.sqlite import SQLiteBroker
-from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
-from apscheduler.schedulers.background import BackgroundScheduler
+from dramatiq.middleware import Interrupt
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Callable
+from utils.llm_client import llm_client
+
+try:
+    import zstandard
+except ImportError:  # Fall back to zlib for job results
+    zstandard = None
 
 # Create a SQLite broker for dramatiq
 broker_path = os.path.abspath("worker.db")
@@ -22,12 +31,413 @@ dramatiq.set_broker(broker)
 # Database path for storing job information
 DB_PATH = os.path.abspath("jobs.db")
 
+# Directory holding compressed job results, addressed by content hash
+RESULTS_DIR = os.path.abspath("job_results")
+
+# Completed results are reused for identical jobs for this long (seconds)
+RESULT_CACHE_TTL = 7 * 24 * 3600
+
+# Maximum number of cached results; least recently used entries are evicted
+RESULT_CACHE_MAX_ENTRIES = 1000
+
+# Index cache statistics of worker processes not heard from for this long are
+# dropped (seconds)
+INDEX_CACHE_STATS_MAX_AGE = 24 * 3600
+
+# Dramatiq queue and worker capacity per job type. Each job type gets its own
+# queue, and queues are consumed by worker groups: a queue in a group of its
+# own has dedicated workers, so a burst of slow jobs elsewhere cannot starve
+# it. Within a group shared by several queues, lower priority values run
+# first when the workers have several messages waiting. A group's capacity is
+# the largest processes/threads of its queues; None lets worker.py derive it
+# from the CPU count.
+JOB_QUEUES = {
+    'explanation': {'queue_name': 'explanation', 'group': 'interactive', 'priority': 0, 'processes': None, 'threads': None},
+    'comparison': {'queue_name': 'comparison', 'group': 'comparison', 'priority': 10, 'processes': None, 'threads': None},
+    'batch_comparison': {'queue_name': 'batch', 'group': 'comparison', 'priority': 20, 'processes': None, 'threads': None},
+}
+
+# Longest a job may run before dramatiq interrupts it (seconds). A job still
+# marked processing after this long belongs to a worker that died.
+JOB_TIME_LIMIT = 300
+
+# Extra time a batch comparison job gets per variable pair (seconds), since
+# its pairs are compared one after another
+BATCH_PAIR_TIME_LIMIT = 60
+
+# Used for job types without an entry in JOB_QUEUES
+DEFAULT_JOB_QUEUE = {'queue_name': 'default', 'group': 'default', 'priority': 50, 'processes': 1, 'threads': 1}
+
+# Unreferenced result blobs younger than this are kept, since a job that is
+# completing right now may be about to reference them (seconds)
+RESULT_GRACE_PERIOD = 3600
+
+# Pragmas applied to every jobs.db connection. WAL lets readers run while a
+# writer commits, and synchronous=NORMAL is safe in WAL mode (a power loss can
+# only drop the last commits, never corrupt the database).
+DB_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",  # ~16MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Maximum number of idle connections kept per process
+DB_POOL_SIZE = 16
+
+# Maximum number of queued writes applied in a single commit
+WRITE_BATCH_MAX = 256
+
+# Longest a caller waits for the writer thread to commit its write (seconds)
+WRITE_TIMEOUT = 60
+
+# How often to check jobs.db for commits made by other processes (seconds)
+NOTIFY_POLL_INTERVAL = 0.25
+
+# Job types whose LLM output is saved on the job while it is being generated
+STREAMING_JOB_TYPES = ('explanation', 'comparison')
+
+# Minimum time between writes of streamed text to a job (seconds). The first
+# piece is always written right away.
+PARTIAL_TEXT_INTERVAL = 0.2
+
+def _connect() -> sqlite3.Connection:
+    """Open a tuned connection to the jobs database."""
+    conn = sqlite3.connect(DB_PATH, timeout=5.0, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+class PooledConnection:
+    """
+    A pooled jobs.db connection.
+
+    Behaves like a sqlite3.Connection, except that close() hands the
+    connection back to the pool instead of closing it.
+    """
+
+    def __init__(self, pool: 'ConnectionPool', conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+class ConnectionPool:
+    """
+    Per-process pool of jobs.db connections.
+
+    A connection is only ever used by the thread that acquired it; once it is
+    released any other thread may pick it up, so long-lived worker threads
+    keep reusing the same warm connection and page cache.
+    """
+
+    def __init__(self, max_idle: int = DB_POOL_SIZE):
+        self.max_idle = max_idle
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def acquire(self) -> PooledConnection:
+        with self._lock:
+            # Connections must not be shared with a forked child process
+            if self._pid != os.getpid():
+                self._idle = []
+                self._pid = os.getpid()
+            conn = self._idle.pop() if self._idle else None
+
+        if conn is None:
+            conn = _connect()
+        return PooledConnection(self, conn)
+
+    def release(self, conn: sqlite3.Connection):
+        # Never hand out a connection with an open transaction
+        if conn.in_transaction:
+            conn.rollback()
+
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+class _WriteRequest:
+    """A write waiting to be applied by the JobWriter."""
+
+    __slots__ = ('fn', 'args', 'result', 'error', 'done')
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+class JobWriter:
+    """
+    Single writer thread for the jobs database.
+
+    All writes in a process go through one thread. Whatever writes have piled
+    up while the previous commit was running are applied together in one
+    transaction (group commit), so concurrent status transitions share a
+    single WAL sync instead of fighting over the write lock. Callers block
+    until their write is committed, for at most the write timeout. If the
+    writer thread cannot open the database or stops, the writes waiting for
+    it fail and the next write starts a new thread.
+    """
+
+    def __init__(self, max_batch: int = WRITE_BATCH_MAX, timeout: float = WRITE_TIMEOUT):
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+
+            # Threads do not survive a fork, so each process gets its own writer
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+
+            self._thread = threading.Thread(target=self._run, name="jobs-db-writer", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def submit(self, fn: Callable, *args) -> Any:
+        """
+        Apply a write and wait for it to be committed.
+
+        Args:
+            fn: Function called as fn(conn, *args) inside the write transaction
+            *args: Arguments for fn
+
+        Returns:
+            The return value of fn
+        """
+        self._ensure_started()
+
+        request = _WriteRequest(fn, args)
+        self._queue.put(request)
+        if not request.done.wait(self.timeout):
+            raise sqlite3.OperationalError(f"Jobs database write not committed within {self.timeout:g}s")
+
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run(self):
+        try:
+            conn = _connect()
+            conn.isolation_level = None  # Transactions are managed explicitly
+
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                self._commit(conn, batch)
+        except Exception as e:
+            print(f"Jobs database writer stopped: {e}")
+            with self._lock:
+                self._pid = None  # The next write starts a new writer
+            self._fail_pending(e)
+
+    def _fail_pending(self, error: Exception):
+        """Fail every write still waiting in the queue."""
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            request.error = error
+            request.done.set()
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[_WriteRequest]):
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+
+            for request in batch:
+                # A savepoint per write keeps one bad write from failing the batch
+                conn.execute('SAVEPOINT job_write')
+                try:
+                    request.result = request.fn(conn, *request.args)
+                    conn.execute('RELEASE job_write')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO job_write')
+                    conn.execute('RELEASE job_write')
+                    request.error = e
+
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for request in batch:
+                if request.error is None:
+                    request.error = e
+        finally:
+            for request in batch:
+                request.done.set()
+
+class JobNotifier:
+    """
+    Wakes up listeners when a job they subscribed to changes.
+    
+    Status changes made in this process are published directly by
+    update_job_status. Changes committed by other processes (the workers) are
+    picked up by a watcher thread that checks PRAGMA data_version, which only
+    changes when another connection commits, and then re-reads just the
+    subscribed jobs. Queued jobs are also published when their queue position
+    may have moved, i.e. when the queue head or their type's queued count
+    changes.
+    """
+    
+    def __init__(self, poll_interval: float = NOTIFY_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._subscribers: Dict[str, List[queue.Queue]] = {}
+        self._last_seen: Dict[str, Tuple[str, str, Optional[int], Optional[Tuple[int, int]]]] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+    
+    def subscribe(self, job_id: str) -> queue.Queue:
+        """
+        Subscribe to changes of a job.
+        
+        Args:
+            job_id: Job ID
+            
+        Returns:
+            Queue that receives the job ID each time the job changes
+        """
+        self._ensure_started()
+        
+        events = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(events)
+        return events
+    
+    def unsubscribe(self, job_id: str, events: queue.Queue):
+        """Remove a subscription created by subscribe()."""
+        with self._lock:
+            listeners = self._subscribers.get(job_id, [])
+            if events in listeners:
+                listeners.remove(events)
+            if not listeners:
+                self._subscribers.pop(job_id, None)
+                self._last_seen.pop(job_id, None)
+    
+    def publish(self, job_id: str):
+        """Wake up everyone subscribed to a job."""
+        with self._lock:
+            listeners = list(self._subscribers.get(job_id, []))
+        for events in listeners:
+            events.put(job_id)
+    
+    def _ensure_started(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            
+            self._thread = threading.Thread(target=self._watch, name="jobs-db-notifier", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+    
+    def _watch(self):
+        conn = _connect()
+        data_version = None
+        
+        while True:
+            time.sleep(self.poll_interval)
+            
+            try:
+                version = conn.execute('PRAGMA data_version').fetchone()[0]
+                if version == data_version:
+                    continue
+                data_version = version
+                
+                with self._lock:
+                    job_ids = list(self._subscribers)
+                if not job_ids:
+                    continue
+                
+                # Queued jobs move up when jobs leave the queue, which moves
+                # the head or lowers the queued count of their type
+                head_seq = conn.execute('SELECT head_seq FROM queue_state WHERE id = 1').fetchone()[0]
+                queued_counts = dict(conn.execute(
+                    'SELECT type, count FROM job_counts WHERE status = ?', (JobStatus.QUEUED,)
+                ).fetchall())
+                
+                # Re-read only the subscribed jobs, in chunks to stay under
+                # SQLite's bound-parameter limit
+                for start in range(0, len(job_ids), 500):
+                    chunk = job_ids[start:start + 500]
+                    rows = conn.execute(
+                        f'SELECT id, type, status, updated_at, length(partial_text) AS partial_length '
+                        f'FROM jobs WHERE id IN ({",".join("?" * len(chunk))})',
+                        chunk
+                    ).fetchall()
+                    
+                    for row in rows:
+                        queue_marker = None
+                        if row['status'] == JobStatus.QUEUED:
+                            queue_marker = (head_seq, queued_counts.get(row['type'], 0))
+                        state = (row['status'], row['updated_at'], row['partial_length'], queue_marker)
+                        if state != self._last_seen.get(row['id']):
+                            self._last_seen[row['id']] = state
+                            self.publish(row['id'])
+            except sqlite3.Error as e:
+                print(f"Error watching jobs database: {e}")
+
+db_pool = ConnectionPool()
+job_writer = JobWriter()
+job_notifier = JobNotifier()
+
+def get_db_connection():
+    """Get a pooled database connection. Call close() to return it to the pool."""
+    return db_pool.acquire()
+
+# Job status constants
+class JobStatus:
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+def _add_column(cursor, table: str, column: str, definition: str):
+    """Add a column to an existing table if it is missing."""
+    columns = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+    if column not in columns:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
 # Initialize database
 def init_db():
     """Initialize the jobs database."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = _connect()
     cursor = conn.cursor()
     
+    # Serialize schema setup between processes starting at the same time
+    cursor.execute('BEGIN IMMEDIATE')
+    
     # Create jobs table for tracking jobs
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS jobs (
@@ -38,68 +448,670 @@ def init_db():
         updated_at TIMESTAMP NOT NULL,
         params TEXT,
         result TEXT,
-        error TEXT
+        error TEXT,
+        enqueue_seq INTEGER,
+        result_ref TEXT,
+        dedup_key TEXT,
+        cache_key TEXT,
+        started_at TIMESTAMP,
+        partial_text TEXT
+    )
+    ''')
+    _add_column(cursor, 'jobs', 'enqueue_seq', 'INTEGER')
+    _add_column(cursor, 'jobs', 'result_ref', 'TEXT')
+    _add_column(cursor, 'jobs', 'dedup_key', 'TEXT')
+    _add_column(cursor, 'jobs', 'cache_key', 'TEXT')
+    _add_column(cursor, 'jobs', 'started_at', 'TIMESTAMP')
+    _add_column(cursor, 'jobs', 'partial_text', 'TEXT')
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status_seq ON jobs (status, enqueue_seq)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status_type_seq ON jobs (status, type, enqueue_seq)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_result_ref ON jobs (result_ref)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_dedup ON jobs (dedup_key, status)')
+    
+    # Results of completed jobs, reusable by identical jobs on unchanged indexes
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS result_cache (
+        cache_key TEXT PRIMARY KEY,
+        type TEXT NOT NULL,
+        result_ref TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used_at REAL NOT NULL
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_result_cache_last_used ON result_cache (last_used_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_result_cache_ref ON result_cache (result_ref)')
+    
+    # Time jobs spend queued before a worker picks them up, per job type
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS queue_wait_stats (
+        type TEXT PRIMARY KEY,
+        jobs INTEGER NOT NULL,
+        total_wait REAL NOT NULL,
+        max_wait REAL NOT NULL,
+        last_wait REAL NOT NULL
+    )
+    ''')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS cache_stats (
+        type TEXT PRIMARY KEY,
+        hits INTEGER NOT NULL,
+        misses INTEGER NOT NULL
+    )
+    ''')
+    
+    # Index cache statistics of each worker process, saved after every job
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS index_cache_stats (
+        pid INTEGER PRIMARY KEY,
+        stats TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    ''')
+    
+    # Live job counts per type and status, maintained by every write
+    has_counts = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'job_counts'"
+    ).fetchone()
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS job_counts (
+        type TEXT NOT NULL,
+        status TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (type, status)
+    )
+    ''')
+    
+    if not has_counts:
+        # One-off scan to seed the counters from existing jobs
+        cursor.execute(
+            'INSERT INTO job_counts (type, status, count) SELECT type, status, COUNT(*) FROM jobs GROUP BY type, status'
+        )
+    
+    # Queue cursors: next_seq is handed to the next enqueued job, head_seq is
+    # the lowest sequence number that may still be queued
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS queue_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        next_seq INTEGER NOT NULL,
+        head_seq INTEGER NOT NULL
     )
     ''')
     
+    if cursor.execute('SELECT 1 FROM queue_state').fetchone() is None:
+        # Number jobs that were queued before sequences existed, oldest first
+        queued = cursor.execute(
+            'SELECT id FROM jobs WHERE status = ? ORDER BY created_at ASC',
+            (JobStatus.QUEUED,)
+        ).fetchall()
+        cursor.executemany(
+            'UPDATE jobs SET enqueue_seq = ? WHERE id = ?',
+            [(seq, row['id']) for seq, row in enumerate(queued, start=1)]
+        )
+        cursor.execute(
+            'INSERT INTO queue_state (id, next_seq, head_seq) VALUES (1, ?, 1)',
+            (len(queued) + 1,)
+        )
+    
     conn.commit()
     conn.close()
 
 # Initialize the database on module import
 init_db()
 
-# Job status constants
-class JobStatus:
-    QUEUED = "queued"
-    PROCESSING = "processing"
-    COMPLETED = "completed"
-    FAILED = "failed"
+def _result_path(digest: str, codec: str) -> str:
+    """Path of a stored result blob."""
+    return os.path.join(RESULTS_DIR, digest[:2], f"{digest}.{codec}")
 
-def get_db_connection():
-    """Get a database connection."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+def store_result(result_json: str) -> str:
+    """
+    Compress a JSON result into the result store.
+    
+    Blobs are addressed by the SHA-256 of their JSON, so identical results
+    are only stored once.
+    
+    Args:
+        result_json: Result serialized as JSON
+        
+    Returns:
+        Result reference of the form '<codec>:<sha256>'
+    """
+    data = result_json.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+    codec = 'zst' if zstandard is not None else 'zlib'
+    path = _result_path(digest, codec)
+    
+    if os.path.exists(path):
+        # Mark the blob as recently used so cleanup leaves it alone
+        os.utime(path)
+    else:
+        if codec == 'zst':
+            compressed = zstandard.ZstdCompressor(level=3).compress(data)
+        else:
+            compressed = zlib.compress(data, 6)
+        
+        # Write to a temporary file first so readers never see a partial blob
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+    
+    return f"{codec}:{digest}"
 
-def create_job(job_type: str, params: Dict[str, Any]) -> str:
+def load_result(result_ref: str) -> str:
     """
-    Create a new job and add it to the queue.
+    Read a result from the result store.
     
     Args:
-        job_type: Type of job (e.g., 'explanation', 'comparison')
-        params: Job parameters
+        result_ref: Reference returned by store_result
         
     Returns:
-        Job ID
+        Result serialized as JSON
     """
-    job_id = str(uuid.uuid4())
-    now = datetime.now().isoformat()
+    codec, digest = result_ref.split(':', 1)
+    
+    with open(_result_path(digest, codec), 'rb') as f:
+        compressed = f.read()
+    
+    if codec == 'zst':
+        data = zstandard.ZstdDecompressor().decompress(compressed)
+    else:
+        data = zlib.decompress(compressed)
     
+    return data.decode('utf-8')
+
+def delete_unreferenced_results(result_refs: List[str]) -> int:
+    """
+    Remove result blobs that no job refers to any more.
+    
+    Args:
+        result_refs: Candidate result references
+        
+    Returns:
+        Number of blobs removed
+    """
     conn = get_db_connection()
+    removed = 0
+    
+    for result_ref in set(result_refs):
+        if conn.execute('SELECT 1 FROM jobs WHERE result_ref = ? LIMIT 1', (result_ref,)).fetchone():
+            continue
+        if conn.execute('SELECT 1 FROM result_cache WHERE result_ref = ? LIMIT 1', (result_ref,)).fetchone():
+            continue
+        
+        codec, digest = result_ref.split(':', 1)
+        path = _result_path(digest, codec)
+        try:
+            if time.time() - os.path.getmtime(path) > RESULT_GRACE_PERIOD:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    
+    conn.close()
+    return removed
+
+def _insert_job(conn, job_id: str, job_type: str, params_json: str, now: str,
+                dedup_key: Optional[str], cache_key: Optional[str], stale_before: str) -> Tuple[str, bool]:
+    """
+    Insert a new queued job row, unless an identical job is already in flight
+    or its result is cached. Runs on the writer thread.
+    
+    Jobs that started processing before stale_before are past their time
+    limit (their worker died), so they are never joined.
+    
+    Returns:
+        Tuple of (job ID, whether the job needs to be processed)
+    """
+    if dedup_key is not None:
+        existing = conn.execute(
+            '''
+            SELECT id FROM jobs
+            WHERE dedup_key = ? AND (status = ? OR (status = ? AND updated_at >= ?))
+            LIMIT 1
+            ''',
+            (dedup_key, JobStatus.QUEUED, JobStatus.PROCESSING, stale_before)
+        ).fetchone()
+        if existing:
+            return existing['id'], False
+    
+    if cache_key is not None:
+        result_ref = _get_cached_result(conn, job_type, cache_key)
+        if result_ref is not None:
+            # Cache hit: the job is born completed
+            conn.execute(
+                'INSERT INTO jobs (id, type, status, created_at, updated_at, params, result_ref, dedup_key, cache_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, job_type, JobStatus.COMPLETED, now, now, params_json, result_ref, dedup_key, cache_key)
+            )
+            _bump_job_count(conn, job_type, JobStatus.COMPLETED, 1)
+            return job_id, False
+    
+    seq = conn.execute('SELECT next_seq FROM queue_state WHERE id = 1').fetchone()[0]
+    conn.execute('UPDATE queue_state SET next_seq = next_seq + 1 WHERE id = 1')
+    
     conn.execute(
-        'INSERT INTO jobs (id, type, status, created_at, updated_at, params) VALUES (?, ?, ?, ?, ?, ?)',
-        (job_id, job_type, JobStatus.QUEUED, now, now, json.dumps(params))
+        'INSERT INTO jobs (id, type, status, created_at, updated_at, params, enqueue_seq, dedup_key, cache_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (job_id, job_type, JobStatus.QUEUED, now, now, params_json, seq, dedup_key, cache_key)
     )
-    conn.commit()
+    _bump_job_count(conn, job_type, JobStatus.QUEUED, 1)
+    
+    return job_id, True
+
+def _get_cached_result(conn, job_type: str, cache_key: str) -> Optional[str]:
+    """Look up a cached result and record the hit or miss. Runs on the writer thread."""
+    now = time.time()
+    entry = conn.execute(
+        'SELECT result_ref, created_at FROM result_cache WHERE cache_key = ?', (cache_key,)
+    ).fetchone()
+    
+    hit = entry is not None and now - entry['created_at'] <= RESULT_CACHE_TTL
+    
+    conn.execute(
+        '''
+        INSERT INTO cache_stats (type, hits, misses) VALUES (?, ?, ?)
+        ON CONFLICT (type) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses
+        ''',
+        (job_type, int(hit), int(not hit))
+    )
+    
+    if not hit:
+        return None
+    
+    conn.execute('UPDATE result_cache SET last_used_at = ? WHERE cache_key = ?', (now, cache_key))
+    return entry['result_ref']
+
+def _put_cached_result(conn, job_type: str, cache_key: str, result_ref: str) -> List[str]:
+    """
+    Cache a completed result and evict old entries. Runs on the writer thread.
+    
+    Returns:
+        Result references of evicted entries
+    """
+    now = time.time()
+    conn.execute(
+        '''
+        INSERT INTO result_cache (cache_key, type, result_ref, created_at, last_used_at) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (cache_key) DO UPDATE SET
+            result_ref = excluded.result_ref, created_at = excluded.created_at, last_used_at = excluded.last_used_at
+        ''',
+        (cache_key, job_type, result_ref, now, now)
+    )
+    return _evict_cached_results(conn, now)
+
+def _evict_cached_results(conn, now: float) -> List[str]:
+    """Drop expired entries and trim the cache to its maximum size. Runs on the writer thread."""
+    expired = conn.execute(
+        'SELECT cache_key, result_ref FROM result_cache WHERE created_at < ?',
+        (now - RESULT_CACHE_TTL,)
+    ).fetchall()
+    
+    size = conn.execute('SELECT COUNT(*) FROM result_cache').fetchone()[0] - len(expired)
+    overflow = []
+    if size > RESULT_CACHE_MAX_ENTRIES:
+        overflow = conn.execute(
+            'SELECT cache_key, result_ref FROM result_cache WHERE created_at >= ? ORDER BY last_used_at ASC LIMIT ?',
+            (now - RESULT_CACHE_TTL, size - RESULT_CACHE_MAX_ENTRIES)
+        ).fetchall()
+    
+    evicted = expired + overflow
+    conn.executemany('DELETE FROM result_cache WHERE cache_key = ?', [(row['cache_key'],) for row in evicted])
+    
+    return [row['result_ref'] for row in evicted]
+
+def get_result_cache_stats() -> Dict[str, Any]:
+    """
+    Get result cache statistics.
+    
+    Returns:
+        Dictionary with cache size and hit/miss counts, overall and per job type
+    """
+    conn = get_db_connection()
+    entries = conn.execute('SELECT COUNT(*) FROM result_cache').fetchone()[0]
+    rows = conn.execute('SELECT type, hits, misses FROM cache_stats').fetchall()
     conn.close()
     
-    # Enqueue the job
-    process_job.send(job_id)
+    by_type = {row['type']: {'hits': row['hits'], 'misses': row['misses']} for row in rows}
+    hits = sum(stats['hits'] for stats in by_type.values())
+    misses = sum(stats['misses'] for stats in by_type.values())
+    
+    return {
+        'entries': entries,
+        'max_entries': RESULT_CACHE_MAX_ENTRIES,
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        'by_type': by_type
+    }
+
+def _put_index_cache_stats(conn, pid: int, stats_json: str, now: str, stale_before: str):
+    """Save a worker process's index cache statistics. Runs on the writer thread."""
+    conn.execute('DELETE FROM index_cache_stats WHERE updated_at < ?', (stale_before,))
+    conn.execute(
+        '''
+        INSERT INTO index_cache_stats (pid, stats, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT (pid) DO UPDATE SET stats = excluded.stats, updated_at = excluded.updated_at
+        ''',
+        (pid, stats_json, now)
+    )
+
+def record_index_cache_stats():
+    """Save this process's index cache statistics for get_worker_index_cache_stats."""
+    from utils.retrieval import get_index_cache_stats
+    
+    now = datetime.now()
+    stale_before = now - timedelta(seconds=INDEX_CACHE_STATS_MAX_AGE)
+    job_writer.submit(
+        _put_index_cache_stats, os.getpid(), json.dumps(get_index_cache_stats()),
+        now.isoformat(), stale_before.isoformat()
+    )
+
+def get_worker_index_cache_stats() -> List[Dict[str, Any]]:
+    """
+    Get the index cache statistics last saved by each worker process.
+    
+    Returns:
+        List of per-process statistics, as get_index_cache_stats, with updated_at
+    """
+    stale_before = datetime.now() - timedelta(seconds=INDEX_CACHE_STATS_MAX_AGE)
+    
+    conn = get_db_connection()
+    rows = conn.execute(
+        'SELECT stats, updated_at FROM index_cache_stats WHERE updated_at >= ? ORDER BY pid',
+        (stale_before.isoformat(),)
+    ).fetchall()
+    conn.close()
+    
+    return [dict(json.loads(row['stats']), updated_at=row['updated_at']) for row in rows]
+
+def _bump_job_count(conn, job_type: str, status: str, delta: int):
+    """Adjust the live counter for a job type and status."""
+    conn.execute(
+        '''
+        INSERT INTO job_counts (type, status, count) VALUES (?, ?, ?)
+        ON CONFLICT (type, status) DO UPDATE SET count = count + excluded.count
+        ''',
+        (job_type, status, delta)
+    )
+
+def _update_job(conn, job_id: str, status: str, now: str, result_ref: Optional[str],
+                error: Optional[str], cacheable: bool = True) -> List[str]:
+    """
+    Apply a status transition. Runs on the writer thread.
+    
+    Returns:
+        Result references evicted from the result cache
+    """
+    previous = conn.execute(
+        'SELECT type, status, created_at, enqueue_seq, cache_key FROM jobs WHERE id = ?', (job_id,)
+    ).fetchone()
+    
+    # Streamed text is only kept while a job is running (a retry starts over)
+    if result_ref is not None:
+        conn.execute(
+            'UPDATE jobs SET status = ?, updated_at = ?, result_ref = ?, partial_text = NULL WHERE id = ?',
+            (status, now, result_ref, job_id)
+        )
+    elif error is not None:
+        conn.execute(
+            'UPDATE jobs SET status = ?, updated_at = ?, error = ?, partial_text = NULL WHERE id = ?',
+            (status, now, error, job_id)
+        )
+    else:
+        conn.execute(
+            'UPDATE jobs SET status = ?, updated_at = ?, partial_text = NULL WHERE id = ?',
+            (status, now, job_id)
+        )
+    
+    if not previous:
+        return []
+    
+    evicted = []
+    if status == JobStatus.COMPLETED and result_ref is not None and previous['cache_key'] and cacheable:
+        evicted = _put_cached_result(conn, previous['type'], previous['cache_key'], result_ref)
+    
+    if previous['status'] != status:
+        _bump_job_count(conn, previous['type'], previous['status'], -1)
+        _bump_job_count(conn, previous['type'], status, 1)
+        
+        # Move the head cursor past the job if it just left the front of the queue
+        if previous['status'] == JobStatus.QUEUED:
+            _advance_queue_head(conn, previous['enqueue_seq'])
+        
+        if previous['status'] == JobStatus.QUEUED and status == JobStatus.PROCESSING:
+            conn.execute('UPDATE jobs SET started_at = ? WHERE id = ?', (now, job_id))
+            _record_queue_wait(conn, previous['type'], previous['created_at'], now)
+    
+    return evicted
+
+def _record_queue_wait(conn, job_type: str, created_at: str, started_at: str):
+    """Add a job's queue wait to the per-type statistics. Runs on the writer thread."""
+    wait = (datetime.fromisoformat(started_at) - datetime.fromisoformat(created_at)).total_seconds()
+    conn.execute(
+        '''
+        INSERT INTO queue_wait_stats (type, jobs, total_wait, max_wait, last_wait) VALUES (?, 1, ?, ?, ?)
+        ON CONFLICT (type) DO UPDATE SET
+            jobs = jobs + 1,
+            total_wait = total_wait + excluded.total_wait,
+            max_wait = MAX(max_wait, excluded.max_wait),
+            last_wait = excluded.last_wait
+        ''',
+        (job_type, wait, wait, wait)
+    )
+
+def get_queue_wait_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get queue wait time statistics per job type.
+    
+    Returns:
+        Mapping of job type to jobs started and average, maximum and last
+        wait in seconds
+    """
+    conn = get_db_connection()
+    rows = conn.execute('SELECT type, jobs, total_wait, max_wait, last_wait FROM queue_wait_stats').fetchall()
+    conn.close()
+    
+    return {
+        row['type']: {
+            'queue': get_job_queue(row['type'])['queue_name'],
+            'jobs': row['jobs'],
+            'avg_wait': row['total_wait'] / row['jobs'],
+            'max_wait': row['max_wait'],
+            'last_wait': row['last_wait']
+        }
+        for row in rows
+    }
+
+def _advance_queue_head(conn, departed_seq: Optional[int]):
+    """Move the head cursor to the oldest job still queued."""
+    head_seq, next_seq = conn.execute(
+        'SELECT head_seq, next_seq FROM queue_state WHERE id = 1'
+    ).fetchone()
+    
+    if departed_seq != head_seq:
+        return
+    
+    # Indexed lookup on (status, enqueue_seq), starting at the old head
+    oldest = conn.execute(
+        'SELECT MIN(enqueue_seq) FROM jobs WHERE status = ? AND enqueue_seq > ?',
+        (JobStatus.QUEUED, head_seq)
+    ).fetchone()[0]
+    
+    conn.execute(
+        'UPDATE queue_state SET head_seq = ? WHERE id = 1',
+        (oldest if oldest is not None else next_seq,)
+    )
+
+def _job_key_parts(job_type: str, params: Dict[str, Any]) -> Optional[List[Any]]:
+    """Normalized parameters that determine a job's result, or None if unsupported."""
+    if job_type == 'explanation':
+        # The conversation ID does not change the answer, the context does
+        context = params.get('conversation_context') or ""
+        parts = [
+            params.get('index_dir'),
+            " ".join((params.get('query') or "").split()),
+            hashlib.sha256(context.encode('utf-8')).hexdigest()
+        ]
+    elif job_type == 'comparison':
+        parts = [
+            params.get('index1_dir'),
+            params.get('index2_dir'),
+            (params.get('variable1') or "").strip(),
+            (params.get('variable2') or "").strip()
+        ]
+    elif job_type == 'batch_comparison':
+        parts = [
+            params.get('index1_dir'),
+            params.get('index2_dir'),
+            [[variable1.strip(), variable2.strip()] for variable1, variable2 in params.get('pairs') or []]
+        ]
+    else:
+        return None
+    
+    return parts
+
+def _job_index_dirs(job_type: str, params: Dict[str, Any]) -> List[str]:
+    """Index directories a job reads from."""
+    if job_type == 'explanation':
+        return [params.get('index_dir')]
+    if job_type in ('comparison', 'batch_comparison'):
+        return [params.get('index1_dir'), params.get('index2_dir')]
+    return []
+
+def job_dedup_key(job_type: str, params: Dict[str, Any]) -> Optional[str]:
+    """
+    Build the key under which identical jobs are coalesced.
+    
+    Args:
+        job_type: Type of job
+        params: Job parameters
+        
+    Returns:
+        Dedup key, or None if jobs of this type are never coalesced
+    """
+    parts = _job_key_parts(job_type, params)
+    if parts is None:
+        return None
+    
+    digest = hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+    return f"{job_type}:{digest}"
+
+def result_cache_key(job_type: str, params: Dict[str, Any]) -> Optional[str]:
+    """
+    Build the key under which a job's result is cached.
+    
+    The key covers the normalized parameters, the model and the content
+    version of every index the job reads, so any change to an index
+    invalidates its cached results.
+    
+    Args:
+        job_type: Type of job
+        params: Job parameters
+        
+    Returns:
+        Cache key, or None if results of this job cannot be cached
+    """
+    from utils.retrieval import get_index_version
+    import config
+    
+    parts = _job_key_parts(job_type, params)
+    if parts is None:
+        return None
+    
+    versions = []
+    for index_dir in _job_index_dirs(job_type, params):
+        index_path = os.path.join(config.INDEXES_DIR, index_dir or "")
+        if not index_dir or not os.path.isdir(index_path):
+            return None
+        versions.append(get_index_version(index_path))
+    
+    key = json.dumps([parts, versions, config.VLLM_MODEL])
+    return f"{job_type}:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+def job_time_limit(job_type: str, params: Dict[str, Any]) -> int:
+    """
+    Get how long a job may run before it is interrupted.
+    
+    Args:
+        job_type: Type of job
+        params: Job parameters
+        
+    Returns:
+        Time limit in seconds
+    """
+    if job_type == 'batch_comparison':
+        return JOB_TIME_LIMIT + BATCH_PAIR_TIME_LIMIT * len(params.get('pairs') or [])
+    return JOB_TIME_LIMIT
+
+def _record_job(job_type: str, params: Dict[str, Any]) -> Tuple[str, bool]:
+    """
+    Write a new queued job to the database without enqueueing it.
+    
+    If an identical job is already queued or processing, no new job is
+    written and the existing job's ID is returned instead. If the result of
+    an identical job is cached, the job is written as already completed.
+    
+    Args:
+        job_type: Type of job
+        params: Job parameters
+        
+    Returns:
+        Tuple of (job ID, whether the job needs to be processed)
+    """
+    job_id = str(uuid.uuid4())
+    now = datetime.now()
+    stale_before = now - timedelta(seconds=job_time_limit(job_type, params))
+    
+    return job_writer.submit(
+        _insert_job, job_id, job_type, json.dumps(params), now.isoformat(),
+        job_dedup_key(job_type, params), result_cache_key(job_type, params),
+        stale_before.isoformat()
+    )
+
+def create_job(job_type: str, params: Dict[str, Any]) -> str:
+    """
+    Create a new job and add it to the queue.
+    
+    Submitting a job identical to one that is still queued or processing
+    attaches to that job instead of doing the work twice, and a job whose
+    result is in the result cache completes immediately.
+    
+    Args:
+        job_type: Type of job (e.g., 'explanation', 'comparison')
+        params: Job parameters
+        
+    Returns:
+        Job ID
+    """
+    job_id, needs_processing = _record_job(job_type, params)
+    
+    # Enqueue the job on its type's queue
+    if needs_processing:
+        job_actors.get(job_type, process_job).send_with_options(
+            args=(job_id,),
+            time_limit=job_time_limit(job_type, params) * 1000
+        )
     
     return job_id
 
-def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+def get_job(job_id: str, include_result: bool = False) -> Optional[Dict[str, Any]]:
     """
     Get job information by ID.
     
     Args:
         job_id: Job ID
+        include_result: Whether to fetch the result from the result store
         
     Returns:
         Job information or None if not found
     """
     conn = get_db_connection()
-    job = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    job = conn.execute(
+        'SELECT id, type, status, created_at, updated_at, params, error, result_ref FROM jobs WHERE id = ?',
+        (job_id,)
+    ).fetchone()
     conn.close()
     
     if not job:
@@ -108,15 +1120,96 @@ def get_job(job_id: str) -> Optional[Dict[str, Any]]:
     job_dict = dict(job)
     
     # Parse JSON fields
-    for field in ['params', 'result']:
-        if job_dict.get(field):
-            try:
-                job_dict[field] = json.loads(job_dict[field])
-            except:
-                pass  # Keep as string if JSON parsing fails
+    if job_dict.get('params'):
+        try:
+            job_dict['params'] = json.loads(job_dict['params'])
+        except:
+            pass  # Keep as string if JSON parsing fails
+    
+    if include_result:
+        job_dict['result'] = get_job_result(job_id)
     
     return job_dict
 
+def read_job_result(job_id: str) -> Optional[str]:
+    """
+    Get the raw JSON result of a job.
+    
+    Args:
+        job_id: Job ID
+        
+    Returns:
+        Result serialized as JSON, or None if the job has no result
+    """
+    conn = get_db_connection()
+    job = conn.execute('SELECT result_ref, result FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    conn.close()
+    
+    if not job:
+        return None
+    
+    if job['result_ref']:
+        return load_result(job['result_ref'])
+    
+    # Jobs completed before results moved out of the jobs table
+    return job['result']
+
+def get_job_result(job_id: str) -> Any:
+    """
+    Get the result of a job.
+    
+    Args:
+        job_id: Job ID
+        
+    Returns:
+        Job result, or None if the job has no result
+    """
+    result_json = read_job_result(job_id)
+    
+    if not result_json:
+        return None
+    
+    try:
+        return json.loads(result_json)
+    except:
+        return result_json  # Keep as string if JSON parsing fails
+
+def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the status of a job without loading its parameters or result.
+    
+    Args:
+        job_id: Job ID
+        
+    Returns:
+        Job status information (with queue position if queued) or None if not found
+    """
+    conn = get_db_connection()
+    job = conn.execute(
+        'SELECT id, type, status, created_at, updated_at, error FROM jobs WHERE id = ?',
+        (job_id,)
+    ).fetchone()
+    conn.close()
+    
+    if not job:
+        return None
+    
+    status = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'type': job['type'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at']
+    }
+    
+    if job['status'] == JobStatus.QUEUED:
+        status['queue_position'] = get_queue_position(job_id)
+    
+    if job['status'] == JobStatus.FAILED:
+        status['error'] = job['error']
+    
+    return status
+
 def update_job_status(job_id: str, status: str, result: Any = None, error: str = None) -> bool:
     """
     Update job status.
@@ -132,34 +1225,100 @@ def update_job_status(job_id: str, status: str, result: Any = None, error: str =
     """
     now = datetime.now().isoformat()
     
-    conn = get_db_connection()
-    
     try:
-        if result is not None:
-            # Convert result to JSON string
-            result_json = json.dumps(result)
-            conn.execute(
-                'UPDATE jobs SET status = ?, updated_at = ?, result = ? WHERE id = ?',
-                (status, now, result_json, job_id)
-            )
-        elif error is not None:
-            conn.execute(
-                'UPDATE jobs SET status = ?, updated_at = ?, error = ? WHERE id = ?',
-                (status, now, error, job_id)
-            )
-        else:
-            conn.execute(
-                'UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?',
-                (status, now, job_id)
-            )
-            
-        conn.commit()
+        # Results live in the result store; the jobs row only keeps a reference
+        result_ref = store_result(json.dumps(result)) if result is not None else None
+        
+        # Never reuse a result that reports an error
+        cacheable = not (isinstance(result, dict) and result.get('error'))
+        
+        evicted = job_writer.submit(_update_job, job_id, status, now, result_ref, error, cacheable)
+        job_notifier.publish(job_id)
+        
+        if evicted:
+            delete_unreferenced_results(evicted)
         return True
     except Exception as e:
         print(f"Error updating job {job_id}: {e}")
         return False
-    finally:
-        conn.close()
+
+def _append_partial_text(conn, job_id: str, text: str):
+    """Append streamed text to a running job. Runs on the writer thread."""
+    conn.execute(
+        "UPDATE jobs SET partial_text = COALESCE(partial_text, '') || ? WHERE id = ? AND status = ?",
+        (text, job_id, JobStatus.PROCESSING)
+    )
+
+def append_job_partial_text(job_id: str, text: str) -> bool:
+    """
+    Append text the LLM has generated so far to a running job.
+    
+    Args:
+        job_id: Job ID
+        text: Newly generated text
+        
+    Returns:
+        Success flag
+    """
+    try:
+        job_writer.submit(_append_partial_text, job_id, text)
+        job_notifier.publish(job_id)
+        return True
+    except Exception as e:
+        print(f"Error saving partial text for job {job_id}: {e}")
+        return False
+
+def get_job_partial_text(job_id: str, offset: int = 0) -> Optional[str]:
+    """
+    Get the text a running job's LLM has generated so far.
+    
+    Args:
+        job_id: Job ID
+        offset: Number of characters the caller already has
+        
+    Returns:
+        Text after the offset ("" if there is none yet), or None if the job's
+        text is now shorter than the offset (it was restarted)
+    """
+    conn = get_db_connection()
+    row = conn.execute(
+        'SELECT length(partial_text) AS length, substr(partial_text, ?) AS text FROM jobs WHERE id = ?',
+        (offset + 1, job_id)
+    ).fetchone()
+    conn.close()
+    
+    length = row['length'] if row and row['length'] else 0
+    if length < offset:
+        return None
+    return row['text'] if length else ""
+
+class PartialTextWriter:
+    """
+    Sink for streamed LLM output that saves it on the job as it arrives.
+    
+    The first piece is written right away, so the answer starts showing as
+    soon as the LLM produces it; after that, pieces are collected and written
+    at most every PARTIAL_TEXT_INTERVAL seconds.
+    """
+    
+    def __init__(self, job_id: str, interval: float = PARTIAL_TEXT_INTERVAL):
+        self.job_id = job_id
+        self.interval = interval
+        self.pending: List[str] = []
+        self.last_write: Optional[float] = None
+    
+    def __call__(self, text: str):
+        self.pending.append(text)
+        if self.last_write is None or time.monotonic() - self.last_write >= self.interval:
+            self.flush()
+    
+    def flush(self):
+        if not self.pending:
+            return
+        text = "".join(self.pending)
+        self.pending = []
+        self.last_write = time.monotonic()
+        append_job_partial_text(self.job_id, text)
 
 def get_queue_position(job_id: str) -> int:
     """
@@ -173,21 +1332,28 @@ def get_queue_position(job_id: str) -> int:
     """
     conn = get_db_connection()
     
-    # Get jobs that are currently queued, ordered by creation time
-    queued_jobs = conn.execute(
-        'SELECT id FROM jobs WHERE status = ? ORDER BY created_at ASC',
-        (JobStatus.QUEUED,)
-    ).fetchall()
+    job = conn.execute('SELECT type, status, enqueue_seq FROM jobs WHERE id = ?', (job_id,)).fetchone()
     
-    conn.close()
+    # Job is not in the queue
+    if not job or job['status'] != JobStatus.QUEUED:
+        conn.close()
+        return 0
+    
+    # Each job type has its own queue. Count the queued jobs of the same type
+    # between the head of the queue and this job: a range scan on
+    # (status, type, enqueue_seq) that only touches the jobs ahead of it.
+    position = conn.execute(
+        '''
+        SELECT COUNT(*) FROM jobs
+        WHERE status = ? AND type = ?
+          AND enqueue_seq BETWEEN (SELECT head_seq FROM queue_state WHERE id = 1) AND ?
+        ''',
+        (JobStatus.QUEUED, job['type'], job['enqueue_seq'])
+    ).fetchone()[0]
     
-    # Find the position of the job in the queue
-    for i, job in enumerate(queued_jobs):
-        if job['id'] == job_id:
-            return i + 1  # 1-based position
+    conn.close()
     
-    # Job is not in the queue
-    return 0
+    return position
 
 def get_job_count() -> Tuple[int, int, int, int]:
     """
@@ -196,20 +1362,93 @@ def get_job_count() -> Tuple[int, int, int, int]:
     Returns:
         Tuple of (queued, processing, completed, failed)
     """
-    conn = get_db_connection()
+    totals = {}
+    for counts in get_job_counts_by_type().values():
+        for status, count in counts.items():
+            totals[status] = totals.get(status, 0) + count
+    
+    return (
+        totals.get(JobStatus.QUEUED, 0),
+        totals.get(JobStatus.PROCESSING, 0),
+        totals.get(JobStatus.COMPLETED, 0),
+        totals.get(JobStatus.FAILED, 0)
+    )
+
+def get_job_counts_by_type() -> Dict[str, Dict[str, int]]:
+    """
+    Get counts of jobs by type and status.
     
-    queued = conn.execute('SELECT COUNT(*) FROM jobs WHERE status = ?', 
-                        (JobStatus.QUEUED,)).fetchone()[0]
-    processing = conn.execute('SELECT COUNT(*) FROM jobs WHERE status = ?', 
-                            (JobStatus.PROCESSING,)).fetchone()[0]
-    completed = conn.execute('SELECT COUNT(*) FROM jobs WHERE status = ?', 
-                           (JobStatus.COMPLETED,)).fetchone()[0]
-    failed = conn.execute('SELECT COUNT(*) FROM jobs WHERE status = ?', 
-                        (JobStatus.FAILED,)).fetchone()[0]
+    Reads the job_counts summary table, whose size depends only on the number
+    of job types, not on the number of jobs.
     
+    Returns:
+        Mapping of job type to a mapping of status to count
+    """
+    conn = get_db_connection()
+    rows = conn.execute('SELECT type, status, count FROM job_counts').fetchall()
     conn.close()
     
-    return (queued, processing, completed, failed)
+    counts = {}
+    for row in rows:
+        counts.setdefault(row['type'], {})[row['status']] = row['count']
+    
+    return counts
+
+def _delete_old_jobs(conn, cutoff_date: str) -> Tuple[int, List[str]]:
+    """Delete finished jobs last updated before the cutoff. Runs on the writer thread."""
+    result_refs = [row[0] for row in conn.execute(
+        'SELECT result_ref FROM jobs WHERE status IN (?, ?) AND updated_at < ? AND result_ref IS NOT NULL',
+        (JobStatus.COMPLETED, JobStatus.FAILED, cutoff_date)
+    )]
+    
+    deleted = conn.execute(
+        '''
+        SELECT type, status, COUNT(*) FROM jobs
+        WHERE status IN (?, ?) AND updated_at < ?
+        GROUP BY type, status
+        ''',
+        (JobStatus.COMPLETED, JobStatus.FAILED, cutoff_date)
+    ).fetchall()
+    
+    conn.execute(
+        'DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?',
+        (JobStatus.COMPLETED, JobStatus.FAILED, cutoff_date)
+    )
+    
+    for job_type, status, count in deleted:
+        _bump_job_count(conn, job_type, status, -count)
+    
+    result_refs += _evict_cached_results(conn, time.time())
+    
+    return sum(row[2] for row in deleted), result_refs
+
+def _fail_stale_jobs(conn, now: datetime) -> List[str]:
+    """Mark jobs processing for longer than their time limit as failed. Runs on the writer thread."""
+    candidates = conn.execute(
+        'SELECT id, type, params, updated_at FROM jobs WHERE status = ? AND updated_at < ?',
+        (JobStatus.PROCESSING, (now - timedelta(seconds=JOB_TIME_LIMIT)).isoformat())
+    ).fetchall()
+    
+    job_ids = []
+    for job in candidates:
+        time_limit = job_time_limit(job['type'], json.loads(job['params'] or '{}'))
+        if job['updated_at'] < (now - timedelta(seconds=time_limit)).isoformat():
+            _update_job(conn, job['id'], JobStatus.FAILED, now.isoformat(), None, "Worker stopped while processing the job")
+            job_ids.append(job['id'])
+    return job_ids
+
+def fail_stale_jobs() -> int:
+    """
+    Fail jobs left in processing by a worker that was killed or crashed.
+    
+    Returns:
+        Number of jobs marked as failed
+    """
+    job_ids = job_writer.submit(_fail_stale_jobs, datetime.now())
+    for job_id in job_ids:
+        job_notifier.publish(job_id)
+    
+    return len(job_ids)
 
 def cleanup_old_jobs(days: int = 7) -> int:
     """
@@ -221,32 +1460,27 @@ def cleanup_old_jobs(days: int = 7) -> int:
     Returns:
         Number of jobs cleaned up
     """
-    cutoff_date = (datetime.now() - datetime.timedelta(days=days)).isoformat()
-    
-    conn = get_db_connection()
+    cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
     
-    # Get count of jobs to be deleted
-    count = conn.execute(
-        'SELECT COUNT(*) FROM jobs WHERE status IN (?, ?) AND updated_at < ?',
-        (JobStatus.COMPLETED, JobStatus.FAILED, cutoff_date)
-    ).fetchone()[0]
+    count, result_refs = job_writer.submit(_delete_old_jobs, cutoff_date)
     
-    # Delete old jobs
-    conn.execute(
-        'DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?',
-        (JobStatus.COMPLETED, JobStatus.FAILED, cutoff_date)
-    )
-    
-    conn.commit()
-    conn.close()
+    # Blobs are shared between identical results, so only drop unused ones
+    delete_unreferenced_results(result_refs)
     
     return count
 
-@dramatiq.actor(max_retries=3, time_limit=300000)  # 5 minute time limit
+def get_job_queue(job_type: str) -> Dict[str, Any]:
+    """Get the queue settings for a job type."""
+    return JOB_QUEUES.get(job_type, DEFAULT_JOB_QUEUE)
+
+@dramatiq.actor(max_retries=3, time_limit=JOB_TIME_LIMIT * 1000)
 def process_job(job_id: str):
     """
     Process a job. This is the main worker function that executes the job.
     
+    Jobs are sent to the actor for their type in job_actors; this actor
+    consumes the default queue.
+    
     Args:
         job_id: Job ID
     """
@@ -256,6 +1490,11 @@ def process_job(job_id: str):
         print(f"Job {job_id} not found")
         return
     
+    # A redelivered message must not reopen a job clients already saw finish
+    if job['status'] in (JobStatus.COMPLETED, JobStatus.FAILED):
+        print(f"Job {job_id} already {job['status']}, skipping")
+        return
+    
     # Update job status to processing
     update_job_status(job_id, JobStatus.PROCESSING)
     
@@ -265,13 +1504,19 @@ def process_job(job_id: str):
         
         result = None
         
+        # Save the LLM's answer on the job while it is being generated
+        sink = PartialTextWriter(job_id) if job_type in STREAMING_JOB_TYPES else None
+        
         # Execute different job types
-        if job_type == 'explanation':
-            result = process_explanation_job(params)
-        elif job_type == 'comparison':
-            result = process_comparison_job(params)
-        else:
-            raise ValueError(f"Unknown job type: {job_type}")
+        with llm_client.streaming_to(sink):
+            if job_type == 'explanation':
+                result = process_explanation_job(params)
+            elif job_type == 'comparison':
+                result = process_comparison_job(params)
+            elif job_type == 'batch_comparison':
+                result = process_batch_comparison_job(params)
+            else:
+                raise ValueError(f"Unknown job type: {job_type}")
         
         # Update job as completed
         update_job_status(job_id, JobStatus.COMPLETED, result)
@@ -281,20 +1526,40 @@ def process_job(job_id: str):
         error_msg = str(e)
         print(f"Error processing job {job_id}: {error_msg}")
         update_job_status(job_id, JobStatus.FAILED, error=error_msg)
+    except Interrupt as e:
+        # Time limit or worker shutdown. FAILED is final for clients, so the
+        # message is not retried.
+        print(f"Job {job_id} interrupted: {type(e).__name__}")
+        update_job_status(job_id, JobStatus.FAILED, error=f"Job interrupted ({type(e).__name__})")
+    
+    record_index_cache_stats()
+
+# One actor per job type, each consuming its own queue
+job_actors = {
+    job_type: dramatiq.actor(
+        process_job.fn,
+        actor_name=f"process_{job_type}_queue",
+        queue_name=settings['queue_name'],
+        priority=settings['priority'],
+        max_retries=3,
+        time_limit=JOB_TIME_LIMIT * 1000
+    )
+    for job_type, settings in JOB_QUEUES.items()
+}
 
 def process_explanation_job(params):
     """Process an explanation job."""
     from utils.retrieval import (
-        search_index, query_llm, format_results, load_index
+        search_index, query_llm, format_results, get_cached_index, pack_context
     )
     import config
     
     index_dir = params.get('index_dir')
     query_text = params.get('query')
     
-    # Load the index
+    # Load the index (kept resident in this worker between jobs)
     index_path = os.path.join(config.INDEXES_DIR, index_dir)
-    index, tokenized_corpus, corpus, metadata = load_index(index_path)
+    index, tokenized_corpus, corpus, metadata = get_cached_index(index_path)
     
     # Determine if this is likely a variable query
     is_variable_query = 'variable' in query_text.lower() or any(
@@ -312,12 +1577,8 @@ def process_explanation_job(params):
         is_variable_query=is_variable_query
     )
     
-    # Prepare context for the LLM
-    context = "\n\n".join([
-        f"File: {res['document']['path']} (Chunk {res['document']['chunk_id']})\n"
-        f"{res['document']['content']}" 
-        for res in search_results
-    ])
+    # Prepare context for the LLM, within the token budget
+    context, _, context_stats = pack_context(search_results)
     
     # Get conversation context
     conversation_context = params.get('conversation_context', "")
@@ -332,14 +1593,20 @@ def process_explanation_job(params):
         conversation_context
     )
     
+    # Fail the job rather than completing it with the error as the answer
+    if isinstance(llm_response, dict) and llm_response.get('error'):
+        raise RuntimeError(f"Error querying LLM: {llm_response['error']}")
+    
     # Format the results
-    return format_results(search_results, llm_response)
+    result = format_results(search_results, llm_response)
+    result['context'] = context_stats
+    return result
 
 def process_comparison_job(params):
     """Process a comparison job."""
     from utils.retrieval import (
-        search_variable_context, compare_implementations, 
-        format_sources, load_index
+        search_comparison_sides, compare_implementations, 
+        format_sources, pack_context
     )
     import config
     
@@ -352,36 +1619,32 @@ def process_comparison_job(params):
     index1_path = os.path.join(config.INDEXES_DIR, index1_dir)
     index2_path = os.path.join(config.INDEXES_DIR, index2_dir)
     
-    index1, tokenized_corpus1, corpus1, metadata1 = load_index(index1_path)
-    index2, tokenized_corpus2, corpus2, metadata2 = load_index(index2_path)
-    
-    # Search for variables in respective indexes
-    results1 = search_variable_context(variable1, index1, tokenized_corpus1, corpus1)
-    results2 = search_variable_context(variable2, index2, tokenized_corpus2, corpus2)
+    # Load and search both sides concurrently
+    start = time.perf_counter()
+    side1, side2 = search_comparison_sides(index1_path, variable1, index2_path, variable2)
+    search_seconds = time.perf_counter() - start
     
-    # Prepare context for the LLM
-    context1 = "\n\n".join([
-        f"File: {res['document']['path']} (Chunk {res['document']['chunk_id']})\n"
-        f"{res['document']['content']}" 
-        for res in results1
-    ])
+    results1, metadata1 = side1['results'], side1['metadata']
+    results2, metadata2 = side2['results'], side2['metadata']
     
-    context2 = "\n\n".join([
-        f"File: {res['document']['path']} (Chunk {res['document']['chunk_id']})\n"
-        f"{res['document']['content']}" 
-        for res in results2
-    ])
+    # Prepare context for the LLM, within the token budget of each side
+    context1, packed1, context_stats1 = pack_context(results1)
+    context2, packed2, context_stats2 = pack_context(results2)
     
     # Query the LLM to compare the implementations
     comparison = compare_implementations(
         variable1, variable2,
         context1, context2,
         metadata1, metadata2,
-        results1, results2,
+        packed1, packed2,
         config.VLLM_ENDPOINT,
         config.VLLM_MODEL
     )
     
+    # Fail the job rather than completing it with the error as the answer
+    if comparison.get("error"):
+        raise RuntimeError(f"Error querying LLM: {comparison['error']}")
+    
     # Format the results
     return {
         "comparison": comparison["generated_text"],
@@ -392,48 +1655,110 @@ def process_comparison_job(params):
         "language1": metadata1['language'],
         "language2": metadata2['language'],
         "repo1": metadata1['name'],
-        "repo2": metadata2['name']
+        "repo2": metadata2['name'],
+        "timings": {
+            "side1": side1['timings'],
+            "side2": side2['timings'],
+            "search_seconds": round(search_seconds, 4)
+        },
+        "context": {
+            "side1": context_stats1,
+            "side2": context_stats2,
+            "tokens_saved": context_stats1['tokens_saved'] + context_stats2['tokens_saved']
+        }
     }
 
-# Start a cleanup scheduler to remove old jobs
-scheduler = BackgroundScheduler()
-scheduler.add_job(lambda: cleanup_old_jobs(7), 'interval', days=1)
-scheduler.start()
-
-# Start worker process(es)
-def start_workers(num_workers=2):
-    """Start background worker processes."""
-    from dramatiq.cli import main as dramatiq_main
-    import sys
-    
-    # Create worker processes
-    for i in range(num_workers):
-        worker_thread = threading.Thread(
-            target=lambda: dramatiq_main(
-                [
-                    "dramatiq", 
-                    "utils.background",
-                    "--processes", "1",
-                    "--threads", "2"
-                ]
-            ),
-            daemon=True
+def process_batch_comparison_job(params):
+    """Process a batch comparison job (many variable pairs over the same two indexes)."""
+    from utils.retrieval import (
+        search_variables_context, compare_implementations,
+        format_sources, get_cached_index, pack_context
+    )
+    import config
+    
+    index1_dir = params.get('index1_dir')
+    index2_dir = params.get('index2_dir')
+    pairs = params.get('pairs')
+    
+    # Load both indexes
+    index1_path = os.path.join(config.INDEXES_DIR, index1_dir)
+    index2_path = os.path.join(config.INDEXES_DIR, index2_dir)
+    
+    index1, tokenized_corpus1, corpus1, metadata1 = get_cached_index(index1_path)
+    index2, tokenized_corpus2, corpus2, metadata2 = get_cached_index(index2_path)
+    
+    # Search for all variables of each side in one pass over its index
+    all_results1 = search_variables_context([pair[0] for pair in pairs], index1, tokenized_corpus1, corpus1)
+    all_results2 = search_variables_context([pair[1] for pair in pairs], index2, tokenized_corpus2, corpus2)
+    
+    comparisons = []
+    for variable1, variable2 in pairs:
+        results1 = all_results1[variable1]
+        results2 = all_results2[variable2]
+        
+        # Prepare context for the LLM, within the token budget of each side
+        context1, packed1, context_stats1 = pack_context(results1)
+        context2, packed2, context_stats2 = pack_context(results2)
+        
+        # Query the LLM to compare the implementations
+        comparison = compare_implementations(
+            variable1, variable2,
+            context1, context2,
+            metadata1, metadata2,
+            packed1, packed2,
+            config.VLLM_ENDPOINT,
+            config.VLLM_MODEL
         )
-        worker_thread.start()
-        print(f"Started worker {i+1}")
+        
+        # Fail the job rather than completing it with the error as an answer
+        if comparison.get("error"):
+            raise RuntimeError(f"Error querying LLM for {variable1} / {variable2}: {comparison['error']}")
+        
+        comparisons.append({
+            "comparison": comparison["generated_text"],
+            "sources1": format_sources(results1, metadata1['language']),
+            "sources2": format_sources(results2, metadata2['language']),
+            "variable1": variable1,
+            "variable2": variable2,
+            "context": {
+                "side1": context_stats1,
+                "side2": context_stats2,
+                "tokens_saved": context_stats1['tokens_saved'] + context_stats2['tokens_saved']
+            }
+        })
+    
+    # Format the results
+    return {
+        "comparisons": comparisons,
+        "language1": metadata1['language'],
+        "language2": metadata2['language'],
+        "repo1": metadata1['name'],
+        "repo2": metadata2['name']
+    }
 
 
 
 # Add to app.py
 
 # Import worker functionality
+import queue
+import time
+from flask import Response, stream_with_context
 from utils.background import (
-    create_job, get_job, get_queue_position, 
-    JobStatus, start_workers
+    create_job, get_job, get_job_status, get_job_result, read_job_result, 
+    get_queue_position, get_queue_wait_stats, get_result_cache_stats, 
+    get_job_partial_text, get_worker_index_cache_stats, JobStatus, job_notifier
 )
+from utils.llm_client import get_completion_cache_stats
+from utils.retrieval import get_index_cache_stats
+
+# How long a job event stream stays open before asking the client to reconnect
+JOB_STREAM_TIMEOUT = 300
 
-# Start background workers
-start_workers(num_workers=2)
+# Interval between keep-alive comments on an idle job event stream
+JOB_STREAM_KEEPALIVE = 15
+
+# Background workers run as a separate, supervised process: python worker.py
 
 @app.route('/api/query-async/<index_dir>', methods=['POST'])
 def query_async(index_dir):
@@ -488,14 +1813,15 @@ def query_async(index_dir):
             'conversation_context': conversation_context
         }
         
-        # Create background job
+        # Create background job (may attach to an identical job or hit the result cache)
         job_id = create_job('explanation', job_params)
+        job = get_job_status(job_id)
         
         return jsonify({
             'job_id': job_id,
-            'status': JobStatus.QUEUED,
+            'status': job['status'],
             'conversation_id': conversation_id,
-            'queue_position': get_queue_position(job_id)
+            'queue_position': job.get('queue_position', 0)
         })
     
     except Exception as e:
@@ -533,13 +1859,72 @@ def compare_async():
             'variable2': variable2
         }
         
-        # Create background job
+        # Create background job (may attach to an identical job or hit the result cache)
         job_id = create_job('comparison', job_params)
+        job = get_job_status(job_id)
+        
+        return jsonify({
+            'job_id': job_id,
+            'status': job['status'],
+            'queue_position': job.get('queue_position', 0)
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Most variable pairs accepted in one batch comparison. Pairs run one after
+# another, so this also bounds the batch job's time limit (see job_time_limit).
+MAX_BATCH_PAIRS = 20
+
+@app.route('/api/compare-batch-async', methods=['POST'])
+def compare_batch_async():
+    """API endpoint for queuing a comparison of many variable pairs between two indexes"""
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    # Get comparison parameters
+    data = request.json
+    index1_dir = data.get('index1_dir')
+    index2_dir = data.get('index2_dir')
+    pairs = data.get('pairs') or []
+    
+    # Pairs are given as [{"variable1": ..., "variable2": ...}, ...]
+    if not isinstance(pairs, list) or not all(isinstance(pair, dict) for pair in pairs):
+        return jsonify({'error': 'pairs must be a list of {"variable1": ..., "variable2": ...} objects'}), 400
+    pairs = [[pair.get('variable1'), pair.get('variable2')] for pair in pairs]
+    
+    if not all([index1_dir, index2_dir, pairs]):
+        return jsonify({'error': 'Missing required parameters'}), 400
+    
+    if not all(isinstance(variable, str) and variable.strip() for pair in pairs for variable in pair):
+        return jsonify({'error': 'Each pair needs non-empty variable1 and variable2 strings'}), 400
+    
+    if len(pairs) > MAX_BATCH_PAIRS:
+        return jsonify({'error': f'At most {MAX_BATCH_PAIRS} pairs can be compared at once'}), 400
+    
+    try:
+        # Verify indexes exist
+        index1_path = os.path.join(config.INDEXES_DIR, index1_dir)
+        index2_path = os.path.join(config.INDEXES_DIR, index2_dir)
+        
+        if not (os.path.exists(index1_path) and os.path.exists(index2_path)):
+            return jsonify({'error': 'One or both indexes not found'}), 404
+        
+        # Create job parameters
+        job_params = {
+            'index1_dir': index1_dir,
+            'index2_dir': index2_dir,
+            'pairs': pairs
+        }
+        
+        # Create background job (may attach to an identical job or hit the result cache)
+        job_id = create_job('batch_comparison', job_params)
+        job = get_job_status(job_id)
         
         return jsonify({
             'job_id': job_id,
-            'status': JobStatus.QUEUED,
-            'queue_position': get_queue_position(job_id)
+            'status': job['status'],
+            'queue_position': job.get('queue_position', 0)
         })
     
     except Exception as e:
@@ -551,32 +1936,137 @@ def job_status(job_id):
     if not session.get('logged_in'):
         return jsonify({'error': 'Not authenticated'}), 401
     
-    job = get_job(job_id)
+    # Includes the queue position if queued and the error if failed
+    response = get_job_status(job_id)
+    
+    if not response:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    # The result itself is fetched separately, only when the client needs it
+    if response['status'] == JobStatus.COMPLETED:
+        response['result_url'] = url_for('job_result', job_id=job_id)
+    
+    # The answer so far, while the LLM is still generating it
+    if response['status'] == JobStatus.PROCESSING:
+        response['partial_text'] = get_job_partial_text(job_id) or ""
+    
+    return jsonify(response)
+
+@app.route('/api/job-result/<job_id>', methods=['GET'])
+def job_result(job_id):
+    """API endpoint to fetch the result of a completed job"""
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    job = get_job_status(job_id)
     
     if not job:
         return jsonify({'error': 'Job not found'}), 404
     
-    response = {
-        'job_id': job_id,
-        'status': job['status'],
-        'type': job['type'],
-        'created_at': job['created_at'],
-        'updated_at': job['updated_at']
-    }
+    if job['status'] != JobStatus.COMPLETED:
+        return jsonify({'error': 'Job not completed'}), 400
     
-    # Add queue position if job is queued
-    if job['status'] == JobStatus.QUEUED:
-        response['queue_position'] = get_queue_position(job_id)
+    # Send the stored JSON as is rather than parsing and re-encoding it
+    return Response(read_job_result(job_id), mimetype='application/json')
+
+@app.route('/api/job-events/<job_id>', methods=['GET'])
+def job_events(job_id):
+    """Server-sent events stream that pushes a job's status changes and its streamed text"""
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Not authenticated'}), 401
     
-    # Add result if job is completed
-    if job['status'] == JobStatus.COMPLETED:
-        response['result'] = job['result']
+    if not get_job_status(job_id):
+        return jsonify({'error': 'Job not found'}), 404
     
-    # Add error if job failed
-    if job['status'] == JobStatus.FAILED:
-        response['error'] = job['error']
+    def stream():
+        events = job_notifier.subscribe(job_id)
+        deadline = time.monotonic() + JOB_STREAM_TIMEOUT
+        last_state = None
+        sent = 0  # Characters of streamed text sent so far
+        
+        try:
+            while True:
+                state = get_job_status(job_id)
+                
+                # Deleted by cleanup while the stream was open
+                if state is None:
+                    state = {'job_id': job_id, 'status': JobStatus.FAILED, 'error': 'Job not found'}
+                    yield f"event: status\ndata: {json.dumps(state)}\n\n"
+                    return
+                
+                if state != last_state:
+                    last_state = state
+                    
+                    if state['status'] == JobStatus.COMPLETED:
+                        state = dict(state, result_url=url_for('job_result', job_id=job_id))
+                    
+                    yield f"event: status\ndata: {json.dumps(state)}\n\n"
+                
+                # Forward only the text added since the last event
+                if state['status'] == JobStatus.PROCESSING:
+                    text = get_job_partial_text(job_id, sent)
+                    if text is None:  # The job was restarted; send its text from the start
+                        sent = 0
+                        text = get_job_partial_text(job_id) or ""
+                    if text:
+                        yield f"event: partial\ndata: {json.dumps({'offset': sent, 'text': text})}\n\n"
+                        sent += len(text)
+                
+                if state['status'] in (JobStatus.COMPLETED, JobStatus.FAILED):
+                    return
+                
+                # Bound how long a request thread is held; the client reopens the stream
+                if time.monotonic() > deadline:
+                    yield "event: reconnect\ndata: {}\n\n"
+                    return
+                
+                try:
+                    events.get(timeout=JOB_STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            job_notifier.unsubscribe(job_id, events)
+    
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/queue-stats', methods=['GET'])
+def queue_stats():
+    """API endpoint to get queue wait times per job type"""
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Not authenticated'}), 401
     
-    return jsonify(response)
+    return jsonify(get_queue_wait_stats())
+
+@app.route('/api/result-cache-stats', methods=['GET'])
+def result_cache_stats():
+    """API endpoint to get result cache hit/miss statistics"""
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    return jsonify(get_result_cache_stats())
+
+@app.route('/api/index-cache-stats', methods=['GET'])
+def index_cache_stats():
+    """API endpoint to get index cache hits and load times of the app and each worker process"""
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    return jsonify({
+        'app': get_index_cache_stats(),
+        'workers': get_worker_index_cache_stats()
+    })
+
+@app.route('/api/llm-cache-stats', methods=['GET'])
+def llm_cache_stats():
+    """API endpoint to get LLM completion cache hit/miss statistics"""
+    if not session.get('logged_in'):
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    return jsonify(get_completion_cache_stats())
 
 # For explanation jobs, add a helper to update conversation after completion
 @app.route('/api/save-explanation-result/<job_id>/<conversation_id>/<index_dir>', methods=['POST'])
@@ -585,7 +2075,7 @@ def save_explanation_result(job_id, conversation_id, index_dir):
     if not session.get('logged_in'):
         return jsonify({'error': 'Not authenticated'}), 401
     
-    job = get_job(job_id)
+    job = get_job_status(job_id)
     
     if not job:
         return jsonify({'error': 'Job not found'}), 404
@@ -598,7 +2088,7 @@ def save_explanation_result(job_id, conversation_id, index_dir):
     
     try:
         # Get the result
-        result = job['result']
+        result = get_job_result(job_id)
         
         # Add assistant response to the conversation
         add_message(
@@ -631,9 +2121,13 @@ def save_explanation_result(job_id, conversation_id, index_dir):
 <script>
     // Add this to your existing script in chat.html
     
-    // Variables to track polling
+    // Variables to track the job stream and polling
     let currentJobId = null;
     let pollingInterval = null;
+    let jobEventSource = null;
+    
+    // Answer text received so far for the current job
+    let partialText = '';
     
     // Handle query submission with background processing
     queryForm.addEventListener('submit', async function(e) {
@@ -682,8 +2176,8 @@ def save_explanation_result(job_id, conversation_id, index_dir):
             // Update UI to show job is processing
             addProcessingMessage(data.job_id, data.queue_position);
             
-            // Start polling for job status
-            startJobPolling(data.job_id);
+            // Listen for job status updates
+            startJobStream(data.job_id);
             
             // Clear input
             queryInput.value = '';
@@ -706,6 +2200,7 @@ def save_explanation_result(job_id, conversation_id, index_dir):
         const messageDiv = document.createElement('div');
         messageDiv.className = 'message message-assistant fade-in';
         messageDiv.id = `job-${jobId}`;
+        partialText = '';
         
         // Create message content
         const contentDiv = document.createElement('div');
@@ -758,7 +2253,7 @@ def save_explanation_result(job_id, conversation_id, index_dir):
                     <div>Your request is in queue (position ${queuePosition})...</div>
                 </div>
             `;
-        } else if (status === 'processing') {
+        } else if (status === 'processing' && !contentDiv.querySelector('.message-streaming')) {
             contentDiv.innerHTML = `
                 <div class="d-flex align-items-center">
                     <div class="spinner-border spinner-border-sm text-primary me-2" role="status"></div>
@@ -768,15 +2263,152 @@ def save_explanation_result(job_id, conversation_id, index_dir):
         }
     }
     
+    // Function to show the answer while it is being generated
+    function updatePartialMessage(jobId, offset, text) {
+        const messageDiv = document.getElementById(`job-${jobId}`);
+        if (!messageDiv) return;
+        
+        // The server resends the text from offset 0 when a stream is reopened
+        partialText = partialText.slice(0, offset) + text;
+        
+        const contentDiv = messageDiv.querySelector('.message-content');
+        let streamingDiv = contentDiv.querySelector('.message-streaming');
+        if (!streamingDiv) {
+            contentDiv.innerHTML = '';
+            streamingDiv = document.createElement('div');
+            streamingDiv.className = 'message-streaming';
+            streamingDiv.style.whiteSpace = 'pre-wrap';
+            contentDiv.appendChild(streamingDiv);
+        }
+        streamingDiv.textContent = partialText;
+        
+        // Scroll to bottom
+        conversationContainer.scrollTop = conversationContainer.scrollHeight;
+    }
+    
+    // Function to stop listening for job updates
+    function stopJobUpdates() {
+        if (jobEventSource) {
+            jobEventSource.close();
+            jobEventSource = null;
+        }
+        if (pollingInterval) {
+            clearInterval(pollingInterval);
+            pollingInterval = null;
+        }
+    }
+    
+    // Function to fetch the result of a completed job
+    async function fetchJobResult(resultUrl) {
+        const response = await fetch(resultUrl);
+        
+        if (!response.ok) {
+            throw new Error(`HTTP error! Status: ${response.status}`);
+        }
+        
+        return response.json();
+    }
+    
+    // Function to apply a job status update to the UI
+    async function handleJobStatus(jobId, data) {
+        if (data.status === 'queued') {
+            updateProcessingMessage(jobId, 'queued', data.queue_position);
+        } else if (data.status === 'processing') {
+            if (data.partial_text) {
+                // Polling returns the whole answer so far
+                updatePartialMessage(jobId, 0, data.partial_text);
+            } else {
+                updateProcessingMessage(jobId, 'processing');
+            }
+        } else if (data.status === 'completed') {
+            // Stop listening for updates
+            stopJobUpdates();
+            currentJobId = null;
+            
+            try {
+                // Replace processing message with result
+                replaceWithResult(jobId, await fetchJobResult(data.result_url));
+                
+                // Save to conversation history
+                saveExplanationResult(jobId);
+            } catch (error) {
+                console.error('Error fetching job result:', error);
+                addMessageToUI('assistant', `Error: ${error.message}`);
+            }
+            
+            // Reset loading state
+            loadingElement.classList.add('d-none');
+            queryButton.disabled = false;
+            queryButton.innerHTML = '<i class="fas fa-paper-plane me-1"></i> Send';
+            
+            // Focus input for next message
+            queryInput.focus();
+        } else if (data.status === 'failed') {
+            // Stop listening for updates
+            stopJobUpdates();
+            currentJobId = null;
+            
+            // Replace with error message
+            const messageDiv = document.getElementById(`job-${jobId}`);
+            if (messageDiv) {
+                const contentDiv = messageDiv.querySelector('.message-content');
+                contentDiv.innerHTML = `<div class="alert alert-danger">Error: ${data.error || 'Job processing failed'}</div>`;
+            }
+            
+            // Reset loading state
+            loadingElement.classList.add('d-none');
+            queryButton.disabled = false;
+            queryButton.innerHTML = '<i class="fas fa-paper-plane me-1"></i> Send';
+        }
+    }
+    
+    // Function to receive job status updates pushed by the server
+    function startJobStream(jobId) {
+        // Store current job ID
+        currentJobId = jobId;
+        
+        // Clear any existing stream or polling
+        stopJobUpdates();
+        
+        if (!window.EventSource) {
+            startJobPolling(jobId);
+            return;
+        }
+        
+        const source = new EventSource(`/api/job-events/${jobId}`);
+        jobEventSource = source;
+        
+        source.addEventListener('status', function(e) {
+            handleJobStatus(jobId, JSON.parse(e.data));
+        });
+        
+        // Text the LLM has added to the answer
+        source.addEventListener('partial', function(e) {
+            const data = JSON.parse(e.data);
+            updatePartialMessage(jobId, data.offset, data.text);
+        });
+        
+        // The server closes long-lived streams; open a fresh one
+        source.addEventListener('reconnect', function() {
+            startJobStream(jobId);
+        });
+        
+        // Fall back to polling if the stream drops
+        source.onerror = function() {
+            if (jobEventSource === source) {
+                console.error('Job event stream dropped, falling back to polling');
+                startJobPolling(jobId);
+            }
+        };
+    }
+    
     // Function to start polling for job status
     function startJobPolling(jobId) {
         // Store current job ID
         currentJobId = jobId;
         
-        // Clear any existing polling
-        if (pollingInterval) {
-            clearInterval(pollingInterval);
-        }
+        // Clear any existing stream or polling
+        stopJobUpdates();
         
         // Define polling function
         const pollJobStatus = async () => {
@@ -790,47 +2422,7 @@ def save_explanation_result(job_id, conversation_id, index_dir):
                 const data = await response.json();
                 
                 // Update UI based on job status
-                if (data.status === 'queued') {
-                    updateProcessingMessage(jobId, 'queued', data.queue_position);
-                } else if (data.status === 'processing') {
-                    updateProcessingMessage(jobId, 'processing');
-                } else if (data.status === 'completed') {
-                    // Clear polling
-                    clearInterval(pollingInterval);
-                    pollingInterval = null;
-                    currentJobId = null;
-                    
-                    // Replace processing message with result
-                    replaceWithResult(jobId, data.result);
-                    
-                    // Save to conversation history
-                    saveExplanationResult(jobId);
-                    
-                    // Reset loading state
-                    loadingElement.classList.add('d-none');
-                    queryButton.disabled = false;
-                    queryButton.innerHTML = '<i class="fas fa-paper-plane me-1"></i> Send';
-                    
-                    // Focus input for next message
-                    queryInput.focus();
-                } else if (data.status === 'failed') {
-                    // Clear polling
-                    clearInterval(pollingInterval);
-                    pollingInterval = null;
-                    currentJobId = null;
-                    
-                    // Replace with error message
-                    const messageDiv = document.getElementById(`job-${jobId}`);
-                    if (messageDiv) {
-                        const contentDiv = messageDiv.querySelector('.message-content');
-                        contentDiv.innerHTML = `<div class="alert alert-danger">Error: ${data.error || 'Job processing failed'}</div>`;
-                    }
-                    
-                    // Reset loading state
-                    loadingElement.classList.add('d-none');
-                    queryButton.disabled = false;
-                    queryButton.innerHTML = '<i class="fas fa-paper-plane me-1"></i> Send';
-                }
+                handleJobStatus(jobId, data);
             } catch (error) {
                 console.error('Error polling job status:', error);
             }
@@ -906,9 +2498,13 @@ def save_explanation_result(job_id, conversation_id, index_dir):
         const lang1Badge = document.getElementById('lang1-badge');
         const lang2Badge = document.getElementById('lang2-badge');
         
-        // Variables to track polling
+        // Variables to track the job stream and polling
         let currentJobId = null;
         let pollingInterval = null;
+        let jobEventSource = null;
+        
+        // Comparison text received so far for the current job
+        let partialText = '';
         
         // Update language badges when indexes are selected
         index1Select.addEventListener('change', function() {
@@ -966,8 +2562,8 @@ def save_explanation_result(job_id, conversation_id, index_dir):
                 // Update UI to show job status
                 showJobStatus(data.job_id, data.queue_position);
                 
-                // Start polling for job status
-                startJobPolling(data.job_id);
+                // Listen for job status updates
+                startJobStream(data.job_id);
                 
             } catch (error) {
                 console.error('Error submitting comparison:', error);
@@ -1028,6 +2624,7 @@ def save_explanation_result(job_id, conversation_id, index_dir):
             
             // Store the job ID
             currentJobId = jobId;
+            partialText = '';
         }
         
         // Function to update job status
@@ -1047,13 +2644,135 @@ def save_explanation_result(job_id, conversation_id, index_dir):
             }
         }
         
-        // Function to start polling for job status
-        function startJobPolling(jobId) {
-            // Clear any existing polling
+        // Function to show the comparison while it is being generated
+        function updatePartialComparison(offset, text) {
+            // The server resends the text from offset 0 when a stream is reopened
+            partialText = partialText.slice(0, offset) + text;
+            
+            document.getElementById('comparison-content').innerHTML = formatExplanation(partialText);
+        }
+        
+        // Function to stop listening for job updates
+        function stopJobUpdates() {
+            if (jobEventSource) {
+                jobEventSource.close();
+                jobEventSource = null;
+            }
             if (pollingInterval) {
                 clearInterval(pollingInterval);
+                pollingInterval = null;
+            }
+        }
+        
+        // Function to fetch the result of a completed job
+        async function fetchJobResult(resultUrl) {
+            const response = await fetch(resultUrl);
+            
+            if (!response.ok) {
+                throw new Error(`HTTP error! Status: ${response.status}`);
+            }
+            
+            return response.json();
+        }
+        
+        // Function to apply a job status update to the UI
+        async function handleJobStatus(data) {
+            if (data.status === 'queued') {
+                updateJobStatus('queued', data.queue_position);
+            } else if (data.status === 'processing') {
+                updateJobStatus('processing');
+                
+                // Polling returns the whole comparison so far
+                if (data.partial_text) {
+                    updatePartialComparison(0, data.partial_text);
+                }
+            } else if (data.status === 'completed') {
+                // Stop listening for updates
+                stopJobUpdates();
+                currentJobId = null;
+                
+                try {
+                    // Display results
+                    displayResults(await fetchJobResult(data.result_url));
+                } catch (error) {
+                    console.error('Error fetching job result:', error);
+                    alert(`Error: ${error.message}`);
+                }
+                
+                // Reset loading state
+                loadingElement.classList.add('d-none');
+                compareBtn.disabled = false;
+                compareBtn.innerHTML = '<i class="fas fa-code-compare me-2"></i>Compare Implementations';
+                
+                // Scroll to results
+                resultsContainer.scrollIntoView({ behavior: 'smooth' });
+            } else if (data.status === 'failed') {
+                // Stop listening for updates
+                stopJobUpdates();
+                currentJobId = null;
+                
+                // Show error
+                document.getElementById('comparison-title').innerHTML = `
+                    <i class="fas fa-exclamation-triangle me-2 text-danger"></i>
+                    Error Processing Comparison
+                `;
+                
+                document.getElementById('comparison-content').innerHTML = `
+                    <div class="alert alert-danger">
+                        <strong>Error:</strong> ${data.error || 'An unknown error occurred during comparison.'}
+                    </div>
+                    <p>Please try again or try with different variables.</p>
+                `;
+                
+                // Reset loading state
+                loadingElement.classList.add('d-none');
+                compareBtn.disabled = false;
+                compareBtn.innerHTML = '<i class="fas fa-code-compare me-2"></i>Compare Implementations';
+            }
+        }
+        
+        // Function to receive job status updates pushed by the server
+        function startJobStream(jobId) {
+            // Clear any existing stream or polling
+            stopJobUpdates();
+            
+            if (!window.EventSource) {
+                startJobPolling(jobId);
+                return;
             }
             
+            const source = new EventSource(`/api/job-events/${jobId}`);
+            jobEventSource = source;
+            
+            source.addEventListener('status', function(e) {
+                handleJobStatus(JSON.parse(e.data));
+            });
+            
+            // Text the LLM has added to the comparison
+            source.addEventListener('partial', function(e) {
+                const data = JSON.parse(e.data);
+                updatePartialComparison(data.offset, data.text);
+            });
+            
+            // The server closes long-lived streams; open a fresh one
+            source.addEventListener('reconnect', function() {
+                startJobStream(jobId);
+            });
+            
+            // Fall back to polling if the stream drops
+            source.onerror = function() {
+                if (jobEventSource === source) {
+                    console.error('Job event stream dropped, falling back to polling');
+                    startJobPolling(jobId);
+                }
+            };
+        }
+        
+        // Function to start polling for job status
+        function startJobPolling(jobId) {
+            // Clear any existing stream or polling
+            stopJobUpdates();
+            
             // Define polling function
             const pollJobStatus = async () => {
                 try {
@@ -1066,50 +2785,7 @@ def save_explanation_result(job_id, conversation_id, index_dir):
                     const data = await response.json();
                     
                     // Update UI based on job status
-                    if (data.status === 'queued') {
-                        updateJobStatus('queued', data.queue_position);
-                    } else if (data.status === 'processing') {
-                        updateJobStatus('processing');
-                    } else if (data.status === 'completed') {
-                        // Clear polling
-                        clearInterval(pollingInterval);
-                        pollingInterval = null;
-                        currentJobId = null;
-                        
-                        // Display results
-                        displayResults(data.result);
-                        
-                        // Reset loading state
-                        loadingElement.classList.add('d-none');
-                        compareBtn.disabled = false;
-                        compareBtn.innerHTML = '<i class="fas fa-code-compare me-2"></i>Compare Implementations';
-                        
-                        // Scroll to results
-                        resultsContainer.scrollIntoView({ behavior: 'smooth' });
-                    } else if (data.status === 'failed') {
-                        // Clear polling
-                        clearInterval(pollingInterval);
-                        pollingInterval = null;
-                        currentJobId = null;
-                        
-                        // Show error
-                        document.getElementById('comparison-title').innerHTML = `
-                            <i class="fas fa-exclamation-triangle me-2 text-danger"></i>
-                            Error Processing Comparison
-                        `;
-                        
-                        document.getElementById('comparison-content').innerHTML = `
-                            <div class="alert alert-danger">
-                                <strong>Error:</strong> ${data.error || 'An unknown error occurred during comparison.'}
-                            </div>
-                            <p>Please try again or try with different variables.</p>
-                        `;
-                        
-                        // Reset loading state
-                        loadingElement.classList.add('d-none');
-                        compareBtn.disabled = false;
-                        compareBtn.innerHTML = '<i class="fas fa-code-compare me-2"></i>Compare Implementations';
-                    }
+                    handleJobStatus(data);
                 } catch (error) {
                     console.error('Error polling job status:', error);
                 }
@@ -1350,7 +3026,7 @@ def job_counts():
     if not session.get('logged_in'):
         return jsonify({'error': 'Not authenticated'}), 401
     
-    from utils.background import get_job_count
+    from utils.background import get_job_count, get_job_counts_by_type
     
     queued, processing, completed, failed = get_job_count()
     
@@ -1358,7 +3034,8 @@ def job_counts():
         'queued': queued,
         'processing': processing,
         'completed': completed,
-        'failed': failed
+        'failed': failed,
+        'by_type': get_job_counts_by_type()
     })
 -->
 
@@ -1426,7 +3103,7 @@ def job_counts():
     if not session.get('logged_in'):
         return jsonify({'error': 'Not authenticated'}), 401
     
-    from utils.background import get_job_count
+    from utils.background import get_job_count, get_job_counts_by_type
     
     queued, processing, completed, failed = get_job_count()
     
@@ -1434,5 +3111,6 @@ def job_counts():
         'queued': queued,
         'processing': processing,
         'completed': completed,
-        'failed': failed
+        'failed': failed,
+        'by_type': get_job_counts_by_type()
     })
@@ -475,6 +475,7 @@
 # Add these imports at the top of app.py if not already present
 from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
 import json
+from utils.llm_client import llm_client
 
 # Add these route handlers to app.py
 
@@ -607,9 +608,8 @@ Organize your analysis in a clear, structured format with headers and sections.
             "model": config.VLLM_MODEL
         }
         
-        response = requests.post(config.VLLM_ENDPOINT, json=payload)
-        response.raise_for_status()
-        result = response.json()
+        # "refresh" asks for a new completion rather than a cached one
+        result = llm_client.generate(config.VLLM_ENDPOINT, payload, use_cache=not data.get('refresh'))
         
         comparison_text = result.get("generated_text", "Unable to generate comparison")
         
@@ -0,0 +1,44 @@
+# scripts/convert_index.py
+"""
+Convert existing index directories to the memory-mapped index format, or
+split them into shards.
+
+Run from the project root:
+    python scripts/convert_index.py                   # every index in config.INDEXES_DIR
+    python scripts/convert_index.py my_repo           # selected indexes
+    python scripts/convert_index.py --shards 8 mono   # split large indexes into shards
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.getcwd())
+
+import config
+from utils.retrieval import convert_index, shard_index
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert indexes to the memory-mapped format")
+    parser.add_argument("indexes", nargs="*", help="Index directory names (default: all)")
+    parser.add_argument("--shards", type=int, help="Split each index into this many shards")
+    args = parser.parse_args()
+
+    names = args.indexes or sorted(
+        name for name in os.listdir(config.INDEXES_DIR)
+        if os.path.exists(os.path.join(config.INDEXES_DIR, name, 'metadata.json'))
+    )
+
+    for name in names:
+        start = time.perf_counter()
+        if args.shards:
+            summary = shard_index(os.path.join(config.INDEXES_DIR, name), args.shards)
+            elapsed = time.perf_counter() - start
+            print(f"{name}: {summary['chunks']} chunks in {summary['shards']} shards in {elapsed:.1f}s")
+        else:
+            summary = convert_index(os.path.join(config.INDEXES_DIR, name))
+            elapsed = time.perf_counter() - start
+            print(f"{name}: {summary['chunks']} chunks, {summary['bytes'] / 1e6:.1f} MB in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
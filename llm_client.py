@@ -0,0 +1,708 @@
+# utils/llm_client.py
+"""
+Shared HTTP client for every call to the vLLM server.
+
+Each process keeps one pooled session with keep-alive connections, every
+request gets a connect and a read timeout, and the number of requests a
+process has in flight is bounded, so a slow or hung server cannot tie up
+every worker thread.
+
+Completions can also be streamed: inside a streaming_to() block, generate()
+asks the server for a streamed response and hands each piece of text to a
+sink as it arrives, so callers further up (the job workers) can show the
+answer while it is still being written.
+
+Completions can be cached on disk (opt-in, LLM_CACHE_ENABLED=1). Identical
+requests (same model, prompt, max_tokens and temperature) are then answered
+from the cache instead of the LLM server.
+
+Requests from concurrent threads can be micro-batched (opt-in,
+LLM_BATCH_WINDOW_MS): the server then gets one request with several prompts
+instead of many small ones.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import requests
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, List, Optional, Iterator, Callable, Tuple
+
+# Seconds to wait for a connection to the LLM server, and for its response
+LLM_CONNECT_TIMEOUT = float(os.environ.get('LLM_CONNECT_TIMEOUT', 5))
+LLM_READ_TIMEOUT = float(os.environ.get('LLM_READ_TIMEOUT', 120))
+
+# Requests a process may have in flight at once (also the connection pool size)
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 8))
+
+# Seconds a request waits for a free slot before giving up
+LLM_QUEUE_TIMEOUT = float(os.environ.get('LLM_QUEUE_TIMEOUT', 60))
+
+# Retries for failed connection attempts (the request was never sent, so
+# retrying a POST is safe)
+LLM_CONNECT_RETRIES = 2
+
+# Set LLM_STREAMING=0 to always wait for complete responses, even when a
+# caller asked for the text to be streamed
+LLM_STREAMING = os.environ.get('LLM_STREAMING', '1') != '0'
+
+# Streamed responses are newline separated (server-sent events, JSON lines)
+# or NUL separated (the vLLM demo API server)
+STREAM_EVENT_SEPARATOR = re.compile(rb'[\n\0]')
+
+# Completion cache (off unless LLM_CACHE_ENABLED=1). Entries are evicted least
+# recently used first once the cached responses exceed LLM_CACHE_MAX_BYTES.
+LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', '0') == '1'
+LLM_CACHE_PATH = os.path.abspath(os.environ.get('LLM_CACHE_PATH', 'llm_cache.db'))
+LLM_CACHE_MAX_BYTES = int(os.environ.get('LLM_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Micro-batching (off unless LLM_BATCH_WINDOW_MS is set). Completion requests
+# made by concurrent threads within the window are sent as one request with
+# a list of prompts, up to LLM_BATCH_MAX_SIZE prompts per request.
+LLM_BATCH_WINDOW = float(os.environ.get('LLM_BATCH_WINDOW_MS', 0)) / 1000
+LLM_BATCH_MAX_SIZE = int(os.environ.get('LLM_BATCH_MAX_SIZE', 16))
+# Longest a thread waits for another thread to send its batch (seconds)
+LLM_BATCH_WAIT_TIMEOUT = float(os.environ.get('LLM_BATCH_WAIT_TIMEOUT', 300))
+
+class LLMClientBusy(Exception):
+    """No request slot became free within the queue timeout."""
+
+class LLMBatchUnsupported(Exception):
+    """The LLM server did not answer a batched request with one completion per prompt."""
+
+class LLMBatchTimeout(Exception):
+    """A batched request was not answered within the batch wait timeout."""
+
+class CompletionCache:
+    """
+    Disk-backed LRU cache of LLM responses, shared by every process.
+
+    Responses are stored in a SQLite database keyed by a hash of the request
+    fields that determine the completion. Hits and misses are counted in the
+    database too, so the hit rate covers all workers.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.ready = False
+        # One connection per thread, reopened in a forked child
+        self.local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use and after a fork."""
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None and self.local.pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+
+        with self.lock:
+            if not self.ready:
+                conn.execute('''
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions (last_used_at)')
+                conn.execute('''
+                CREATE TABLE IF NOT EXISTS completion_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    hits INTEGER NOT NULL,
+                    misses INTEGER NOT NULL
+                )
+                ''')
+                conn.execute('INSERT OR IGNORE INTO completion_stats (id, hits, misses) VALUES (0, 0, 0)')
+                conn.commit()
+                self.ready = True
+
+        self.local.conn = conn
+        self.local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def key(payload: Dict[str, Any]) -> str:
+        """Cache key of a completion request."""
+        fields = [payload.get(name) for name in ('model', 'prompt', 'max_tokens', 'temperature')]
+        return hashlib.sha256(json.dumps(fields).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response and record the hit or miss
+
+        Args:
+            key: Cache key from key()
+
+        Returns:
+            Cached response, or None
+        """
+        conn = self._connect()
+        with conn:
+            row = conn.execute('SELECT response FROM completions WHERE key = ?', (key,)).fetchone()
+            if row:
+                conn.execute('UPDATE completions SET last_used_at = ? WHERE key = ?', (time.time(), key))
+            conn.execute(
+                'UPDATE completion_stats SET hits = hits + ?, misses = misses + ? WHERE id = 0',
+                (int(row is not None), int(row is None))
+            )
+
+        return json.loads(row['response']) if row else None
+
+    def put(self, key: str, response: Dict[str, Any]):
+        """
+        Cache a response and evict the least recently used entries over the size cap
+
+        Args:
+            key: Cache key from key()
+            response: Decoded LLM response
+        """
+        data = json.dumps(response)
+        now = time.time()
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                '''
+                INSERT INTO completions (key, response, size, created_at, last_used_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    response = excluded.response, size = excluded.size, last_used_at = excluded.last_used_at
+                ''',
+                (key, data, len(data), now, now)
+            )
+
+            excess = conn.execute('SELECT COALESCE(SUM(size), 0) FROM completions').fetchone()[0] - self.max_bytes
+            if excess > 0:
+                evicted = []
+                for row in conn.execute('SELECT key, size FROM completions ORDER BY last_used_at ASC'):
+                    if excess <= 0:
+                        break
+                    evicted.append((row['key'],))
+                    excess -= row['size']
+                conn.executemany('DELETE FROM completions WHERE key = ?', evicted)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the cache size and hit/miss counts."""
+        conn = self._connect()
+        entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions').fetchone()
+        stats = conn.execute('SELECT hits, misses FROM completion_stats WHERE id = 0').fetchone()
+
+        hits, misses = stats['hits'], stats['misses']
+        return {
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0
+        }
+
+class _BatchedRequest:
+    """A completion request waiting to be sent in a batch."""
+
+    __slots__ = ('payload', 'sink', 'result', 'error', 'fallback', 'done')
+
+    def __init__(self, payload: Dict[str, Any], sink: Optional[Callable[[str], None]]):
+        self.payload = payload
+        self.sink = sink
+        self.result = None
+        self.error = None
+        # Set when the batch was rejected and the caller should send the request itself
+        self.fallback = False
+        self.done = threading.Event()
+
+class _Batch:
+    """Requests collected for one batched completion request."""
+
+    __slots__ = ('requests', 'full')
+
+    def __init__(self):
+        self.requests: List[_BatchedRequest] = []
+        self.full = threading.Event()
+
+class LLMBatcher:
+    """
+    Collects completion requests from concurrent threads into batched requests.
+
+    The first request of a batch waits up to the batching window for others
+    with the same parameters (everything but the prompt) and then sends them
+    all as one request with a list of prompts; the other callers block until
+    their completion comes back. A batch is sent right away once it reaches
+    the maximum size. If the server does not answer with one completion per
+    prompt, each caller sends its own request instead.
+    """
+
+    def __init__(self, client: 'LLMClient', window: float = LLM_BATCH_WINDOW,
+                 max_size: int = LLM_BATCH_MAX_SIZE,
+                 wait_timeout: float = LLM_BATCH_WAIT_TIMEOUT):
+        self.client = client
+        self.window = window
+        self.max_size = max_size
+        self.wait_timeout = wait_timeout
+        self.lock = threading.Lock()
+        self.pending: Dict[Tuple[str, str], _Batch] = {}
+        self.stats = {
+            'batches': 0,
+            'batched_prompts': 0,
+            'max_batch_size': 0,
+            'fallbacks': 0
+        }
+
+    def generate(self, endpoint: str, payload: Dict[str, Any],
+                 sink: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Get a completion, sent together with those of other threads
+
+        Args:
+            endpoint: VLLM endpoint
+            payload: Request payload
+            sink: Called with each piece of generated text as it arrives
+
+        Returns:
+            Response from the LLM
+        """
+        request = _BatchedRequest(payload, sink)
+        key = (endpoint, json.dumps({name: value for name, value in payload.items() if name != 'prompt'}, sort_keys=True))
+
+        with self.lock:
+            batch = self.pending.get(key)
+            leader = batch is None
+            if leader:
+                batch = self.pending[key] = _Batch()
+            batch.requests.append(request)
+
+            # Close a full batch; the next request starts a new one
+            if len(batch.requests) >= self.max_size:
+                del self.pending[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self.lock:
+                if self.pending.get(key) is batch:
+                    del self.pending[key]
+            self._send(endpoint, batch.requests)
+        elif not request.done.wait(self.window + self.wait_timeout):
+            raise LLMBatchTimeout(f"Batched LLM request was not answered within {self.wait_timeout:g}s")
+
+        if request.fallback:
+            return self.client.complete(endpoint, request.payload, request.sink)
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _send(self, endpoint: str, batch: List[_BatchedRequest]):
+        try:
+            if len(batch) == 1:
+                batch[0].result = self.client.complete(endpoint, batch[0].payload, batch[0].sink)
+                return
+
+            with self.lock:
+                self.stats['batches'] += 1
+                self.stats['batched_prompts'] += len(batch)
+                self.stats['max_batch_size'] = max(self.stats['max_batch_size'], len(batch))
+
+            try:
+                texts = self._complete_batch(endpoint, batch)
+            except (LLMBatchUnsupported, requests.HTTPError) as e:
+                # Only fall back if the server rejected the batch outright
+                response = getattr(e, 'response', None)
+                if response is not None and not 400 <= response.status_code < 500:
+                    raise
+                with self.lock:
+                    self.stats['fallbacks'] += 1
+                for request in batch:
+                    request.fallback = True
+                return
+
+            for request, text in zip(batch, texts):
+                request.result = {"generated_text": text}
+        except Exception as e:
+            for request in batch:
+                if request.result is None and request.error is None:
+                    request.error = e
+        finally:
+            # Never leave a caller without an answer, even if the sending
+            # thread was interrupted
+            for request in batch:
+                if request.result is None and request.error is None and not request.fallback:
+                    request.error = RuntimeError("Batched LLM request was interrupted")
+                request.done.set()
+
+    def _complete_batch(self, endpoint: str, batch: List[_BatchedRequest]) -> List[str]:
+        """Send one request with the prompts of a batch and return each completion."""
+        payload = dict(batch[0].payload, prompt=[request.payload.get('prompt') for request in batch])
+
+        if not LLM_STREAMING or all(request.sink is None for request in batch):
+            response = self.client.post(endpoint, json=payload)
+            response.raise_for_status()
+            return _batch_texts(response.json(), len(batch))
+
+        # Stream, handing each prompt's text to its own caller's sink
+        parts: List[List[str]] = [[] for _ in batch]
+        for index, delta in self.client.stream_choices(endpoint, payload):
+            if not isinstance(index, int) or not 0 <= index < len(batch):
+                raise LLMBatchUnsupported("LLM server returned a completion for an unknown prompt")
+            parts[index].append(delta)
+            if batch[index].sink is not None:
+                batch[index].sink(delta)
+        return ["".join(part) for part in parts]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics for this process."""
+        with self.lock:
+            stats = dict(self.stats)
+        stats['window_ms'] = self.window * 1000
+        stats['max_size'] = self.max_size
+        stats['avg_batch_size'] = stats['batched_prompts'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+class LLMClient:
+    """Pooled, keep-alive HTTP client for the LLM server."""
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 connect_timeout: float = LLM_CONNECT_TIMEOUT,
+                 read_timeout: float = LLM_READ_TIMEOUT,
+                 queue_timeout: float = LLM_QUEUE_TIMEOUT,
+                 cache: Optional[CompletionCache] = None,
+                 batch_window: float = LLM_BATCH_WINDOW,
+                 batch_max_size: int = LLM_BATCH_MAX_SIZE):
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.batcher = LLMBatcher(self, batch_window, batch_max_size) if batch_window > 0 else None
+        self.timeout = (connect_timeout, read_timeout)
+        self.queue_timeout = queue_timeout
+        self.lock = threading.Lock()
+        self.session = None
+        self.slots = None
+        self.pid = None
+        self.local = threading.local()
+        self.stats = {
+            'requests': 0,
+            'streamed': 0,
+            'errors': 0,
+            'busy': 0,
+            'in_flight': 0,
+            'max_in_flight': 0,
+            'total_seconds': 0.0
+        }
+
+    def _get_session(self):
+        """Get this process's session and request slots, creating them after a fork."""
+        with self.lock:
+            if self.session is None or self.pid != os.getpid():
+                retry = Retry(
+                    total=LLM_CONNECT_RETRIES,
+                    connect=LLM_CONNECT_RETRIES,
+                    read=0,
+                    status=0,
+                    redirect=0,
+                    backoff_factor=0.2
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=self.max_concurrency,
+                    max_retries=retry
+                )
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+
+                self.session = session
+                self.slots = threading.BoundedSemaphore(self.max_concurrency)
+                self.pid = os.getpid()
+            return self.session, self.slots
+
+    def _acquire_slot(self, slots: threading.BoundedSemaphore):
+        """Wait for a free request slot and count the request as in flight."""
+        if not slots.acquire(timeout=self.queue_timeout):
+            with self.lock:
+                self.stats['busy'] += 1
+            raise LLMClientBusy(f"No LLM request slot free after {self.queue_timeout}s")
+
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['in_flight'] += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+
+    def _release_slot(self, slots: threading.BoundedSemaphore, start: float):
+        slots.release()
+        with self.lock:
+            self.stats['in_flight'] -= 1
+            self.stats['total_seconds'] += time.perf_counter() - start
+
+    def post(self, url: str, json: Optional[Dict[str, Any]] = None, **kwargs) -> requests.Response:
+        """
+        Send a POST request through the pool; a drop-in for requests.post
+
+        Args:
+            url: URL to post to
+            json: JSON body
+            **kwargs: Other arguments for requests (timeout defaults to the client's)
+
+        Returns:
+            Response
+        """
+        session, slots = self._get_session()
+        self._acquire_slot(slots)
+
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        try:
+            return session.post(url, json=json, **kwargs)
+        except Exception:
+            with self.lock:
+                self.stats['errors'] += 1
+            raise
+        finally:
+            self._release_slot(slots, start)
+
+    def stream(self, endpoint: str, payload: Dict[str, Any]) -> Iterator[str]:
+        """
+        Send a completion request with streaming on and yield the text as it arrives
+
+        The request slot is held until the stream ends or the generator is
+        closed. The read timeout applies to the gap between chunks, not to
+        the whole response.
+
+        Args:
+            endpoint: VLLM endpoint
+            payload: Request payload
+
+        Yields:
+            Pieces of generated text, in order
+        """
+        for _, delta in self.stream_choices(endpoint, payload):
+            yield delta
+
+    def stream_choices(self, endpoint: str, payload: Dict[str, Any]) -> Iterator[Tuple[int, str]]:
+        """
+        Like stream(), for a request that may carry a list of prompts
+
+        Yields:
+            (index of the prompt, piece of its generated text)
+        """
+        session, slots = self._get_session()
+        self._acquire_slot(slots)
+
+        with self.lock:
+            self.stats['streamed'] += 1
+
+        start = time.perf_counter()
+        try:
+            with session.post(endpoint, json=dict(payload, stream=True), stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+
+                prompts = payload.get('prompt')
+                if not isinstance(prompts, list):
+                    prompts = [prompts]
+
+                texts: Dict[int, str] = {}
+                for event in _iter_stream_events(response):
+                    for index, delta, full_text in _parse_stream_event(event):
+                        text = texts.get(index, "")
+
+                        # Some servers resend the whole text so far (with the prompt) each time
+                        if full_text is not None:
+                            prompt = prompts[index] if index < len(prompts) else None
+                            if isinstance(prompt, str) and full_text.startswith(prompt):
+                                full_text = full_text[len(prompt):]
+                            delta = full_text[len(text):] if full_text.startswith(text) else ""
+
+                        if delta:
+                            texts[index] = text + delta
+                            yield index, delta
+        except Exception:
+            with self.lock:
+                self.stats['errors'] += 1
+            raise
+        finally:
+            self._release_slot(slots, start)
+
+    @contextmanager
+    def streaming_to(self, sink: Optional[Callable[[str], None]]):
+        """
+        Stream the text of completions requested by this thread into a sink
+
+        Args:
+            sink: Called with each piece of generated text as it arrives
+                (None turns streaming off)
+        """
+        previous = getattr(self.local, 'sink', None)
+        self.local.sink = sink
+        try:
+            yield
+        finally:
+            self.local.sink = previous
+
+    def generate(self, endpoint: str, payload: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Send a completion request and return the decoded response
+
+        Args:
+            endpoint: VLLM endpoint
+            payload: Request payload
+            use_cache: Whether to use the completion cache, if it is enabled
+
+        Inside a streaming_to() block the response is streamed to the sink,
+        and the text is returned once the stream has ended. A cached response
+        is handed to the sink in one piece. With batching on, the request may
+        be sent together with those of other threads.
+
+        Returns:
+            Response from the LLM
+        """
+        sink = getattr(self.local, 'sink', None)
+
+        cache = self.cache if use_cache else None
+        if cache is not None:
+            key = cache.key(payload)
+            result = cache.get(key)
+            if result is not None:
+                if sink is not None:
+                    sink(result.get("generated_text", ""))
+                return result
+
+        if self.batcher is not None:
+            result = self.batcher.generate(endpoint, payload, sink)
+        else:
+            result = self.complete(endpoint, payload, sink)
+
+        if cache is not None:
+            cache.put(key, result)
+        return result
+
+    def complete(self, endpoint: str, payload: Dict[str, Any],
+                 sink: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Send a single completion request, bypassing the cache and batching
+
+        Args:
+            endpoint: VLLM endpoint
+            payload: Request payload
+            sink: If set, the response is streamed and each piece of text passed to it
+
+        Returns:
+            Response from the LLM
+        """
+        if sink is not None and LLM_STREAMING:
+            parts = []
+            for delta in self.stream(endpoint, payload):
+                parts.append(delta)
+                sink(delta)
+            return {"generated_text": "".join(parts)}
+
+        response = self.post(endpoint, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request statistics for this process."""
+        with self.lock:
+            stats = dict(self.stats)
+        stats['total_seconds'] = round(stats['total_seconds'], 3)
+        stats['max_concurrency'] = self.max_concurrency
+        if self.cache is not None:
+            stats['cache'] = self.cache.get_stats()
+        if self.batcher is not None:
+            stats['batching'] = self.batcher.get_stats()
+        return stats
+
+def _iter_stream_events(response: requests.Response) -> Iterator[bytes]:
+    """Split a streamed response body into its events."""
+    buffer = b""
+    for chunk in response.iter_content(chunk_size=None):
+        buffer += chunk
+        *events, buffer = STREAM_EVENT_SEPARATOR.split(buffer)
+        for event in events:
+            yield event
+    yield buffer
+
+def _parse_stream_event(event: bytes) -> List[Tuple[int, Optional[str], Optional[str]]]:
+    """
+    Get the text from one event of a streamed completion
+
+    Understands OpenAI-style server-sent events, text-generation-inference
+    token events, the vLLM demo server (whole text so far on each event) and
+    plain generated_text objects.
+
+    Returns:
+        List of (prompt index, new text, whole text so far); either text may be None
+    """
+    event = event.strip()
+    if event.startswith(b"data:"):
+        event = event[5:].strip()
+    if not event or event == b"[DONE]":
+        return []
+
+    try:
+        data = json.loads(event)
+    except ValueError:
+        return []  # SSE comments, event names and other framing
+    if not isinstance(data, dict):
+        return []
+
+    if data.get('choices'):
+        texts = []
+        for position, choice in enumerate(data['choices']):
+            delta = choice.get('text')
+            if delta is None:
+                delta = (choice.get('delta') or {}).get('content')
+            texts.append((choice.get('index', position), delta, None))
+        return texts
+
+    if isinstance(data.get('token'), dict):
+        token = data['token']
+        return [(0, None if token.get('special') else token.get('text'), None)]
+
+    if isinstance(data.get('text'), list) and data['text']:
+        return [(0, None, data['text'][0])]
+
+    if isinstance(data.get('generated_text'), str):
+        return [(0, None, data['generated_text'])]
+
+    return []
+
+def _batch_texts(data: Dict[str, Any], count: int) -> List[str]:
+    """Get the completion of each prompt from the response to a batched request."""
+    choices = data.get('choices')
+    if isinstance(choices, list) and len(choices) == count:
+        # Every prompt must get exactly one choice
+        indices = [choice.get('index', position) for position, choice in enumerate(choices)]
+        if sorted(indices) != list(range(count)):
+            raise LLMBatchUnsupported("LLM server returned choices that do not match the prompts")
+
+        texts = [""] * count
+        for index, choice in zip(indices, choices):
+            texts[index] = choice.get('text') or ""
+        return texts
+
+    generated = data.get('generated_text')
+    if isinstance(generated, list) and len(generated) == count:
+        return [text or "" for text in generated]
+
+    raise LLMBatchUnsupported("LLM server did not return a completion per prompt")
+
+llm_client = LLMClient(cache=CompletionCache() if LLM_CACHE_ENABLED else None)
+
+def get_llm_client_stats() -> Dict[str, Any]:
+    """Get LLM request statistics for this process (and the shared completion cache)."""
+    return llm_client.get_stats()
+
+def get_completion_cache_stats() -> Dict[str, Any]:
+    """Get completion cache statistics, shared by all processes."""
+    if llm_client.cache is None:
+        return {'enabled': False}
+    return dict(llm_client.cache.get_stats(), enabled=True)
@@ -0,0 +1,200 @@
+# worker.py
+"""
+Supervised worker pool for background jobs.
+
+Runs the dramatiq workers for every group of job queues as child processes,
+separately from the Flask app. Crashed worker groups are restarted with a
+backoff, and SIGTERM/SIGINT shut everything down gracefully. This process
+also runs the daily cleanup of old jobs, and fails jobs left processing by
+dead workers.
+
+Usage:
+    python worker.py [--processes N] [--threads N] [--queues explanation comparison]
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+from typing import Dict, Any, List, Optional
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from utils.background import JOB_QUEUES, DEFAULT_JOB_QUEUE, JOB_TIME_LIMIT, cleanup_old_jobs, fail_stale_jobs
+
+# Threads per worker process when a queue does not set its own. The BM25
+# search is CPU bound, so more threads mostly help while waiting on vLLM.
+DEFAULT_THREADS = 4
+
+# Seconds to wait for workers to finish their current jobs on shutdown
+SHUTDOWN_TIMEOUT = 60
+
+# Restart backoff for crashed worker groups (seconds)
+RESTART_BACKOFF_MIN = 1
+RESTART_BACKOFF_MAX = 60
+
+# A worker group that ran this long before exiting is considered healthy
+# again, and its restart backoff is reset (seconds)
+HEALTHY_RUNTIME = 300
+
+class WorkerGroup:
+    """A dramatiq worker process (with its own child processes) for one or more queues."""
+
+    def __init__(self, name: str, queue_names: List[str], processes: int, threads: int):
+        self.name = name
+        self.queue_names = queue_names
+        self.processes = processes
+        self.threads = threads
+        self.process: Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+        self.backoff = RESTART_BACKOFF_MIN
+        self.restart_at: Optional[float] = None
+
+    def start(self):
+        self.process = subprocess.Popen([
+            sys.executable, "-m", "dramatiq",
+            "utils.background",
+            "--processes", str(self.processes),
+            "--threads", str(self.threads),
+            "--queues", *self.queue_names
+        ])
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        print(f"Started {self.processes}x{self.threads} workers for {self.name} ({', '.join(self.queue_names)}) (pid {self.process.pid})")
+
+    def check(self):
+        """Restart the group if it has exited, backing off on repeated crashes."""
+        now = time.monotonic()
+
+        if self.restart_at is not None:
+            if now >= self.restart_at:
+                self.start()
+            return
+
+        returncode = self.process.poll()
+        if returncode is None:
+            return
+
+        if now - self.started_at >= HEALTHY_RUNTIME:
+            self.backoff = RESTART_BACKOFF_MIN
+
+        print(f"Workers for {self.name} exited with code {returncode}, restarting in {self.backoff}s")
+        self.restart_at = now + self.backoff
+        self.backoff = min(self.backoff * 2, RESTART_BACKOFF_MAX)
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            # dramatiq finishes in-flight messages on SIGTERM
+            self.process.terminate()
+
+    def wait(self, timeout: float):
+        if self.process is None:
+            return
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            print(f"Workers for {self.name} did not stop in time, killing")
+            self.process.kill()
+            self.process.wait()
+
+class Supervisor:
+    """Starts, watches and stops the worker groups."""
+
+    def __init__(self, groups: List[WorkerGroup]):
+        self.groups = groups
+        self.stopping = False
+
+    def _handle_signal(self, signum, frame):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+        # Clean up old jobs once a day, and fail jobs of dead workers
+        scheduler = BackgroundScheduler()
+        scheduler.add_job(lambda: cleanup_old_jobs(7), 'interval', days=1)
+        scheduler.add_job(fail_stale_jobs, 'interval', seconds=JOB_TIME_LIMIT)
+        scheduler.start()
+
+        for group in self.groups:
+            group.start()
+
+        while not self.stopping:
+            for group in self.groups:
+                group.check()
+            time.sleep(1)
+
+        print("Shutting down workers...")
+        scheduler.shutdown(wait=False)
+
+        for group in self.groups:
+            group.stop()
+
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        for group in self.groups:
+            group.wait(max(0, deadline - time.monotonic()))
+
+def build_groups(queue_names: Optional[List[str]] = None,
+                 processes: Optional[int] = None,
+                 threads: Optional[int] = None) -> List[WorkerGroup]:
+    """
+    Build the worker groups that consume the queues.
+
+    Args:
+        queue_names: Queues to run workers for (default: all)
+        processes: Processes per group, overriding the queue settings
+        threads: Threads per process, overriding the queue settings
+
+    Returns:
+        List of worker groups
+    """
+    queues: List[Dict[str, Any]] = list(JOB_QUEUES.values()) + [DEFAULT_JOB_QUEUE]
+    if queue_names:
+        queues = [settings for settings in queues if settings['queue_name'] in queue_names]
+
+    # Queues sharing a group are consumed by the same workers, which run
+    # their messages in priority order
+    groups: Dict[str, Dict[str, Any]] = {}
+    for settings in queues:
+        group = groups.setdefault(
+            settings.get('group') or settings['queue_name'],
+            {'queue_names': [], 'processes': None, 'threads': None}
+        )
+        group['queue_names'].append(settings['queue_name'])
+        for name in ('processes', 'threads'):
+            if settings.get(name):
+                group[name] = max(group[name] or 0, settings[name])
+
+    # Split the CPUs between the groups that do not set a process count
+    unsized = [group for group in groups.values() if not group['processes']]
+    cpu_share = max(1, (os.cpu_count() or 1) // max(1, len(unsized)))
+
+    return [
+        WorkerGroup(
+            name,
+            group['queue_names'],
+            processes or group['processes'] or cpu_share,
+            threads or group['threads'] or DEFAULT_THREADS
+        )
+        for name, group in groups.items()
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the background job workers")
+    parser.add_argument("--processes", type=int, help="Worker processes per group (default: from CPU count)")
+    parser.add_argument("--threads", type=int, help=f"Threads per worker process (default: {DEFAULT_THREADS})")
+    parser.add_argument("--queues", nargs="+", help="Only run workers for these queues")
+    args = parser.parse_args()
+
+    groups = build_groups(args.queues, args.processes, args.threads)
+
+    # Every worker process starts its own shard search processes, so split
+    # the CPUs between them rather than giving each one a process per CPU
+    total_processes = sum(group.processes for group in groups)
+    os.environ.setdefault('SHARD_POOL_SIZE', str(max(1, (os.cpu_count() or 1) // total_processes)))
+
+    Supervisor(groups).run()
+
+if __name__ == "__main__":
+    main()